@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.driver_finder import DriverFinder
+
+DEFAULT_BINARIES_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "chrome-binaries.json")
+
+_resolved = {}
+_resolve_lock = threading.Lock()
+
+
+def _cache_path():
+    return os.environ.get("BROWSER_BINARIES_CACHE", DEFAULT_BINARIES_CACHE_PATH)
+
+
+def _read_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(path, cache):
+    # Write then rename, so xdist workers never read a half-written file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(cache, file, indent=2)
+    os.replace(temp_path, path)
+
+
+def _is_valid(entry):
+    """Checks that the cached binaries still exist and Chrome has not been updated since they were resolved."""
+    for key in ("driver_path", "browser_path"):
+        if not entry.get(key) or not os.path.isfile(entry[key]):
+            return False
+    return os.path.getmtime(entry["browser_path"]) == entry.get("browser_mtime")
+
+
+def resolve_chrome_binaries(options):
+    """
+    Returns the chromedriver and Chrome paths for the pinned browser version, running Selenium Manager at most once.
+
+    Resolved paths are kept in memory and in a JSON file shared by every worker and run
+    (BROWSER_BINARIES_CACHE, default .cache/chrome-binaries.json), keyed by the requested
+    browser version. An entry is resolved again when a binary disappears or Chrome is updated.
+
+    Args:
+        options: ChromeOptions; `browser_version` pins the Chrome version ("stable", "beta", "122", ...).
+
+    Returns:
+        dict: `driver_path` and `browser_path`.
+    """
+    version = options.browser_version or "default"
+    with _resolve_lock:
+        if version in _resolved:
+            return _resolved[version]
+
+        path = _cache_path()
+        entry = _read_cache(path).get(version)
+        if entry and _is_valid(entry):
+            logging.info(f"📦 Chrome binaries cache hit ({version}): {entry['driver_path']}")
+        else:
+            start = time.perf_counter()
+            finder = DriverFinder(Service(), options)
+            entry = {
+                "driver_path": finder.get_driver_path(),
+                "browser_path": finder.get_browser_path(),
+            }
+            entry["browser_mtime"] = os.path.getmtime(entry["browser_path"])
+            entry["resolved_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            logging.info(f"🧭 Selenium Manager resolved Chrome ({version}) in {time.perf_counter() - start:.2f}s: {entry['driver_path']}")
+
+            cache = _read_cache(path)
+            cache[version] = entry
+            _write_cache(path, cache)
+
+        _resolved[version] = entry
+        return entry
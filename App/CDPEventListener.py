@@ -0,0 +1,243 @@
+import base64
+import fnmatch
+import json
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import trio
+
+DEFAULT_START_TIMEOUT = 10  # Seconds to wait for the websocket session to be ready
+EVENT_BUFFER_SIZE = 256  # CDP events queued between the websocket reader and the listener
+DEFAULT_MAX_REQUEST_AGE = 30  # Seconds after which a pending request is considered long polling
+ACTIVITY_HISTORY_SIZE = 256  # Recent request starts/ends kept to find the last relevant activity
+
+
+class CDPEventListener:
+    """
+    Streams CDP network events of the driver's current tab in a background thread.
+
+    Uses Selenium's CDP websocket connection (`driver.bidi_connection()`, run by trio) instead of
+    the performance log. Responses whose URL contains `url_filter` are tracked as they arrive and
+    their body is fetched as soon as `Network.loadingFinished` fires, before Chrome can evict it.
+    """
+
+    def __init__(self, driver, url_filter):
+        self.driver = driver
+        self.url_filter = url_filter
+        self.error = None
+        self._responses = []
+        self._pending = {}  # requestId -> (url, status) of target responses still loading
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._trio_token = None
+        self._cancel_scope = None
+
+    def start(self, timeout=DEFAULT_START_TIMEOUT):
+        """Opens the CDP session in a background thread and waits until network events are flowing."""
+        self._thread = threading.Thread(target=trio.run, args=(self._listen,), name="cdp-listener", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"❌ CDP listener did not start within {timeout}s: {self.error}")
+        if self.error:
+            raise RuntimeError(f"❌ CDP listener failed to start: {self.error}")
+        logging.info(f"🌐 Streaming CDP network events for: {self.url_filter}")
+
+    def drain(self):
+        """Returns the responses recorded since the last call, as dicts with `url`, `status` and `body`."""
+        with self._lock:
+            responses, self._responses = self._responses, []
+        return responses
+
+    def stop(self):
+        """Closes the CDP session and waits for the background thread to finish."""
+        if self._trio_token is not None and self._cancel_scope is not None:
+            try:
+                trio.from_thread.run_sync(self._cancel_scope.cancel, trio_token=self._trio_token)
+            except trio.RunFinishedError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    async def _listen(self):
+        try:
+            async with self.driver.bidi_connection() as connection:
+                session, devtools = connection.session, connection.devtools
+                with trio.CancelScope() as cancel_scope:
+                    self._cancel_scope = cancel_scope
+                    self._trio_token = trio.lowlevel.current_trio_token()
+                    events = await self._subscribe(session, devtools)
+                    self._ready.set()
+                    async for event in events:
+                        await self._handle(session, devtools, event)
+        except Exception as e:
+            self.error = e
+            logging.error(f"❌ CDP listener stopped: {e}")
+        finally:
+            self._ready.set()
+
+    async def _subscribe(self, session, devtools):
+        """Enables the CDP domain of this listener and returns the receiver of its events."""
+        await session.execute(devtools.network.enable())
+        return session.listen(devtools.network.ResponseReceived, devtools.network.LoadingFinished,
+                              devtools.network.LoadingFailed, buffer_size=EVENT_BUFFER_SIZE)
+
+    async def _handle(self, session, devtools, event):
+        if isinstance(event, devtools.network.ResponseReceived):
+            if self.url_filter in event.response.url:
+                self._pending[event.request_id] = (event.response.url, event.response.status)
+        elif event.request_id in self._pending:
+            url, status = self._pending.pop(event.request_id)
+            body = None
+            # A failed or aborted load has no body to fetch, but the response is still recorded
+            if status == 200 and isinstance(event, devtools.network.LoadingFinished):
+                try:
+                    body, _ = await session.execute(devtools.network.get_response_body(event.request_id))
+                except Exception as e:
+                    logging.error(f"Error capturing response for {url}: {e}")
+            self._record(url, status, body)
+
+    def _record(self, url, status, body):
+        with self._lock:
+            self._responses.append({"url": url, "status": status, "body": body})
+
+
+class FetchInterceptor(CDPEventListener):
+    """
+    Intercepts target responses with the CDP Fetch domain instead of watching all network traffic.
+
+    Only requests matching the target host are paused. The body arrives with the paused response,
+    is recorded, and the response is continued unchanged. With `stubs`, requests are paused at the
+    request stage instead: matching ones are answered locally and never reach the network, the
+    others are continued without being recorded.
+    """
+
+    def __init__(self, driver, url_filter, stubs=None):
+        """
+        Args:
+            driver: WebDriver instance.
+            url_filter (str): Only URLs containing this string are intercepted.
+            stubs (dict): Optional {url substring: response body} served instead of the real responses.
+        """
+        super().__init__(driver, url_filter)
+        self.stubs = stubs or {}
+
+    async def _subscribe(self, session, devtools):
+        host = urlsplit(self.url_filter).netloc or self.url_filter
+        stage = devtools.fetch.RequestStage.REQUEST if self.stubs else devtools.fetch.RequestStage.RESPONSE
+        await session.execute(devtools.fetch.enable(patterns=[
+            devtools.fetch.RequestPattern(url_pattern=f"*{host}*", request_stage=stage),
+        ]))
+        return session.listen(devtools.fetch.RequestPaused, buffer_size=EVENT_BUFFER_SIZE)
+
+    async def _handle(self, session, devtools, event):
+        url = event.request.url
+        try:
+            stub = self._stub_for(url)
+            if stub is not None:
+                origin = (event.request.headers or {}).get("Origin", "*")
+                await session.execute(devtools.fetch.fulfill_request(
+                    event.request_id, 200,
+                    response_headers=[
+                        devtools.fetch.HeaderEntry(name="Content-Type", value="application/json"),
+                        devtools.fetch.HeaderEntry(name="Access-Control-Allow-Origin", value=origin),
+                        devtools.fetch.HeaderEntry(name="Access-Control-Allow-Credentials", value="true"),
+                    ],
+                    body=base64.b64encode(stub.encode("utf-8")).decode("ascii"),
+                ))
+                self._record(url, 200, stub)
+                return
+            if event.response_status_code is None:
+                await session.execute(devtools.fetch.continue_request(event.request_id))
+                return
+
+            body = None
+            if event.response_status_code == 200:
+                try:
+                    body, base64_encoded = await session.execute(devtools.fetch.get_response_body(event.request_id))
+                    if base64_encoded:
+                        body = base64.b64decode(body).decode("utf-8", errors="replace")
+                except Exception as e:
+                    logging.error(f"Error capturing response for {url}: {e}")
+            await session.execute(devtools.fetch.continue_response(event.request_id))
+            self._record(url, event.response_status_code, body)
+        except Exception as e:
+            logging.error(f"❌ Failed to continue intercepted request {url}: {e}")
+
+    def _stub_for(self, url):
+        for substring, body in self.stubs.items():
+            if substring in url:
+                return body if isinstance(body, str) else json.dumps(body)
+        return None
+
+
+class NetworkActivityTracker(CDPEventListener):
+    """
+    Counts the requests of the tab that are still in flight, from CDP network events.
+
+    Requests are tracked from `Network.requestWillBeSent` until `Network.loadingFinished` or
+    `Network.loadingFailed` (which also covers requests blocked by ResourcePolicy). data: URLs and
+    cached responses end at `Network.responseReceived` / `Network.requestServedFromCache`, since
+    Chrome does not always report their loading as finished. Requests matching `ignore_patterns` (fnmatch, like the CDP URL
+    patterns of ResourcePolicy) are never counted, nor are EventSource streams and requests
+    pending for longer than `max_request_age` seconds, which are treated as long polling.
+    """
+
+    def __init__(self, driver, ignore_patterns=(), max_request_age=DEFAULT_MAX_REQUEST_AGE):
+        super().__init__(driver, "*")
+        self.ignore_patterns = list(ignore_patterns)
+        self.max_request_age = max_request_age
+        self._in_flight = {}  # requestId -> (url, monotonic start)
+        self._activity = deque(maxlen=ACTIVITY_HISTORY_SIZE)  # (monotonic time, url) of request starts and ends
+        self._started_at = time.monotonic()
+
+    def is_idle(self, idle_ms, ignore_patterns=()):
+        """
+        Checks that no counted request is in flight and none started or ended in the last `idle_ms` milliseconds.
+
+        Args:
+            idle_ms (int): Quiet period required.
+            ignore_patterns (list): Extra URL patterns ignored for this check only.
+        """
+        patterns = self.ignore_patterns + list(ignore_patterns)
+        now = time.monotonic()
+        with self._lock:
+            in_flight = [url for url, started in self._in_flight.values()
+                         if now - started < self.max_request_age and not _matches_any(url, patterns)]
+            last_activity = next((at for at, url in reversed(self._activity) if not _matches_any(url, patterns)),
+                                 self._started_at)
+        return not in_flight and (now - last_activity) * 1000 >= idle_ms
+
+    async def _subscribe(self, session, devtools):
+        await session.execute(devtools.network.enable())
+        return session.listen(devtools.network.RequestWillBeSent, devtools.network.LoadingFinished,
+                              devtools.network.LoadingFailed, devtools.network.ResponseReceived,
+                              devtools.network.RequestServedFromCache, buffer_size=EVENT_BUFFER_SIZE)
+
+    async def _handle(self, session, devtools, event):
+        now = time.monotonic()
+        with self._lock:
+            if isinstance(event, devtools.network.RequestWillBeSent):
+                if event.type_ == devtools.network.ResourceType.EVENT_SOURCE:
+                    return
+                # A redirect reuses the requestId, so the request simply stays in flight
+                self._in_flight[event.request_id] = (event.request.url, now)
+                self._activity.append((now, event.request.url))
+                return
+            if isinstance(event, devtools.network.ResponseReceived) and not _is_local_response(event.response):
+                return  # A network response is still loading its body until loadingFinished/loadingFailed
+            if event.request_id in self._in_flight:
+                url, _ = self._in_flight.pop(event.request_id)
+                self._activity.append((now, url))
+
+
+def _is_local_response(response):
+    """True for responses that never load a body over the network: data: URLs and cache hits."""
+    return response.url.startswith("data:") or response.from_disk_cache or response.from_prefetch_cache
+
+
+def _matches_any(url, patterns):
+    return any(fnmatch.fnmatch(url, pattern) for pattern in patterns)
@@ -1,7 +1,7 @@
-import time
 import logging
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
+from App.Waits import all_of, evergage_beacon_count, evergage_beacon_sent, network_idle, shadow_element_present, wait_until
 
 class ConfiguratorCompleted:
     def __init__(self, driver):
@@ -18,8 +18,8 @@ class ConfiguratorCompleted:
             logging.info("🔍 Starting configurator interaction.")
 
             # Locate shadow host and expand root
-            shadow_host = self.driver.find_element(By.CSS_SELECTOR,
-                'body > div.root.responsivegrid.owc-content-container > div > main > div > owcc-car-configurator')
+            host_selector = 'body > div.root.responsivegrid.owc-content-container > div > main > div > owcc-car-configurator'
+            shadow_host = self.driver.find_element(By.CSS_SELECTOR, host_selector)
             shadow_root = self.expand_shadow_element(shadow_host)
             logging.info("✅ Shadow DOM expanded.")
 
@@ -30,17 +30,18 @@ class ConfiguratorCompleted:
             logging.info("✅ Hovered over the main frame (ul element).")
             main_frame.click()
             logging.info("✅ Clicked on the main frame (ul element).")
-            time.sleep(2)
 
             # Find the last <li> in the nav
-            last_child = shadow_root.find_element(By.CSS_SELECTOR,
-                '#cc-app-container-main > div.cc-app-container__main-frame.cc-grid-container > div.cc-app-container__navigation.ng-star-inserted > cc-navigation > div > nav > ul > li:last-child')
+            item_selector = '#cc-app-container-main > div.cc-app-container__main-frame.cc-grid-container > div.cc-app-container__navigation.ng-star-inserted > cc-navigation > div > nav > ul > li:last-child'
+            wait_until(self.driver, shadow_element_present(host_selector, item_selector), 2)
+            last_child = shadow_root.find_element(By.CSS_SELECTOR, item_selector)
             logging.info("🔍 Found last child element (li:last-child).")
 
             # Hover over it
             ActionChains(self.driver).move_to_element(last_child).perform()
             logging.info("✅ Hovered over the last child element.")
 
+            beacons_before_click = evergage_beacon_count(self.driver)
             try:
                 # Try to click a child <a> or <button> within the <li>
                 link_inside = last_child.find_element(By.CSS_SELECTOR, 'a, button')
@@ -51,7 +52,8 @@ class ConfiguratorCompleted:
                 self.driver.execute_script("arguments[0].click();", last_child)
                 logging.info("✅ Fallback click on <li> using JavaScript.")
 
-            time.sleep(2)
+            # Evergage has to register the configurator step before the journey moves on
+            wait_until(self.driver, all_of(evergage_beacon_sent(beacons_before_click + 1), network_idle()), 2)
 
         except Exception as e:
             logging.error(f"❌ Error while performing configurator actions: {e}")
\ No newline at end of file
@@ -1,15 +1,48 @@
 from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+import atexit
 import logging
+import os
 import pytest
+import shutil
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from App.BrowserBinaries import resolve_chrome_binaries
+from App.ResourcePolicy import clear_resource_policy
+
+DEFAULT_POOL_MAX_USES = 20  # Tests served by one browser before it is recycled
+DEFAULT_LOOKAHEAD = 1  # Spare browsers started in the background
+MAX_LOOKAHEAD = 2
+DEFAULT_MAX_MEMORY_MB = 2048  # Memory budget for the browsers of one worker
+DEFAULT_BROWSER_MEMORY_MB = 500  # Estimated footprint of one headless Chrome at 2560x1440
+EVERGAGE_ORIGIN = "https://daimleragemea.germany-2.evergage.com"
+ISOLATION_MODES = ("process", "context")
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")  # normal: load event, eager: DOMContentLoaded, none: return at once
 
 
 def build_chrome_options():
+    # With eager/none, driver.get returns before the load event and the readiness probes of TestSteps.navigate take over
+    page_load_strategy = os.environ.get("PAGE_LOAD_STRATEGY", "normal")
+    if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+        raise ValueError(f"❌ Unknown page load strategy '{page_load_strategy}'. Expected one of: {', '.join(PAGE_LOAD_STRATEGIES)}")
+
     options = webdriver.ChromeOptions()
+    options.page_load_strategy = page_load_strategy
     options.add_argument("--headless") # Use new headless mode for better performance  
     options.add_argument("--disable-gpu") 
     options.add_argument("--enable-webgl")
-    options.add_argument("--incognito")
+    disk_cache_root = os.environ.get("BROWSER_DISK_CACHE_DIR")
+    if disk_cache_root:
+        # Throwaway profile per browser for cookies and storage, with the HTTP cache kept outside of it
+        options.user_data_dir = tempfile.mkdtemp(prefix="chrome-profile-")
+        options.disk_cache_slot = _acquire_cache_slot()
+        options.add_argument(f"--user-data-dir={options.user_data_dir}")
+        options.add_argument(f"--disk-cache-dir={os.path.join(disk_cache_root, options.disk_cache_slot)}")
+    else:
+        options.add_argument("--incognito")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
@@ -20,13 +53,66 @@ def build_chrome_options():
 
     # Capabilities
     options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})  # Only network events are read
     options.set_capability("acceptInsecureCerts", True)
+    # Pinned Chrome version, resolved by Selenium Manager. Kept apart from browser_version, which create_driver clears
+    options.pinned_browser_version = os.environ.get("CHROME_VERSION") or None
+    options.browser_version = options.pinned_browser_version
 
     return options
 
 
+def _acquire_cache_slot():
+    """
+    Reserves a disk cache directory name for a new browser.
+
+    Chrome locks its disk cache, so two running browsers never share a directory: each xdist
+    worker uses its own names and, within a worker, every live browser gets its own slot.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    with _cache_slots_lock:
+        slot = 0
+        while slot in _cache_slots_in_use:
+            slot += 1
+        _cache_slots_in_use.add(slot)
+    return f"{worker}-{slot}"
+
+
+def release_browser_profile(options):
+    """Deletes the temporary profile of a quit browser and frees its disk cache slot. The cache itself is kept."""
+    user_data_dir = getattr(options, "user_data_dir", None)
+    if not user_data_dir:
+        return
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+    options.user_data_dir = None
+    with _cache_slots_lock:
+        _cache_slots_in_use.discard(int(options.disk_cache_slot.rsplit("-", 1)[1]))
+
+
+_cache_slots_in_use = set()
+_cache_slots_lock = threading.Lock()
+_startup_times = []  # Seconds taken by each webdriver.Chrome() launch in this worker
+_startup_times_lock = threading.Lock()
+
+
 def create_driver(options):
-    driver = webdriver.Chrome(options=options)
+    # Selenium Manager only runs for the first browser; later launches reuse the resolved paths
+    start = time.perf_counter()
+    try:
+        # Options reused by restart_driver had browser_version cleared by the previous launch
+        options.browser_version = getattr(options, "pinned_browser_version", options.browser_version)
+        binaries = resolve_chrome_binaries(options)
+        options.binary_location = binaries["browser_path"]
+        options.browser_version = None  # As Selenium does once a binary is set, so the version is not resolved again
+        driver = webdriver.Chrome(options=options, service=Service(executable_path=binaries["driver_path"]))
+    except Exception:
+        # No browser owns the temporary profile, e.g. a spare that failed to start in the background
+        release_browser_profile(options)
+        raise
+    startup_seconds = time.perf_counter() - start
+    with _startup_times_lock:
+        _startup_times.append(startup_seconds)
+    logging.info(f"🚗 Chrome started in {startup_seconds:.2f}s.")
     driver.options = options  # Guardamos las opciones para reusarlas en el restart
 
     
@@ -35,14 +121,271 @@ def create_driver(options):
 
 
 def restart_driver(old_driver):
+    old_options = getattr(old_driver, "options", None)
     try:
         options = old_driver.options  # usamos las opciones guardadas previamente
         old_driver.quit()
     except Exception as e:
         logging.warning(f"⚠️ Failed to quit the old browser: {e}")
         options = build_chrome_options()  # fallback en caso de fallo
+    if getattr(old_options, "user_data_dir", None):
+        # The temporary profile belonged to the old browser; the new one gets its own
+        release_browser_profile(old_options)
+        if options is old_options:
+            options = build_chrome_options()
     return create_driver(options)
 
+def reset_driver_state(driver, origins=()):
+    """
+    Wipes every trace of the previous visitor so the next test starts with a clean Evergage profile.
+
+    Replaces every window with a fresh tab, which drops the previous tab's sessionStorage (Chromium
+    does not clear it per origin), then clears cookies plus localStorage, IndexedDB, cache storage and
+    service workers of the given origins, removes blocked URL patterns and discards the buffered
+    performance log. The HTTP cache is kept, so static assets are not downloaded again.
+    """
+    origins = set(origins)
+    if driver.current_url.startswith("http"):
+        parts = urlsplit(driver.current_url)
+        origins.add(f"{parts.scheme}://{parts.netloc}")
+
+    old_handles = driver.window_handles
+    driver.switch_to.new_window("tab")
+    fresh_handle = driver.current_window_handle
+    for handle in old_handles:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(fresh_handle)
+    driver.stealth_applied = False  # Stealth scripts are registered per page, the new tab needs them again
+
+    clear_resource_policy(driver)
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    for origin in origins:
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    driver.get_log("performance")  # Drop the previous test's network events
+
+
+def open_browser_context(driver):
+    """
+    Moves the driver into a fresh CDP browser context, with its own cookie jar and storage.
+
+    The context's tab becomes the current window; the browser's default window stays open on
+    about:blank so the session survives when the context is disposed.
+    """
+    driver.default_handle = driver.current_window_handle
+    context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+    target_id = driver.execute_cdp_cmd("Target.createTarget", {"url": "about:blank", "browserContextId": context_id})["targetId"]
+    driver.browser_context_id = context_id
+    driver.switch_to.window(target_id)  # ChromeDriver window handles are the CDP target ids
+    driver.stealth_applied = False  # Stealth scripts are registered per page, the new tab needs them again
+    return context_id
+
+
+def close_browser_context(driver):
+    """Disposes the driver's current browser context, dropping every cookie and storage entry of the visitor."""
+    context_id = getattr(driver, "browser_context_id", None)
+    if context_id is None:
+        return
+    for handle in driver.window_handles:
+        if handle != driver.default_handle:
+            driver.switch_to.window(handle)
+            driver.close()
+    driver.switch_to.window(driver.default_handle)
+    driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+    driver.browser_context_id = None
+    driver.resource_phase = None  # Blocked URLs lived in the disposed context's tab
+    driver.get_log("performance")  # Drop the previous test's network events
+
+
+class DriverPool:
+    """Per-worker pool that hands out already running Chrome instances with their state reset."""
+
+    def __init__(self, max_uses=DEFAULT_POOL_MAX_USES, lookahead=DEFAULT_LOOKAHEAD,
+                 max_memory_mb=DEFAULT_MAX_MEMORY_MB, browser_memory_mb=DEFAULT_BROWSER_MEMORY_MB, isolation="process"):
+        """
+        Args:
+            max_uses (int): Tests served by one browser before it is recycled. 1 disables reuse.
+            lookahead (int): Spare browsers (0 to 2) started in the background while tests run.
+            max_memory_mb (int): Memory budget for all browsers of this worker; no spare is started beyond it.
+            browser_memory_mb (int): Estimated memory used by one headless Chrome.
+            isolation (str): "process" resets the browser between tests, "context" runs every test
+                in its own CDP browser context, disposed on release.
+        """
+        if isolation not in ISOLATION_MODES:
+            raise ValueError(f"❌ Unknown browser isolation '{isolation}'. Expected one of: {', '.join(ISOLATION_MODES)}")
+        self.isolation = isolation
+        self.max_uses = max_uses
+        self.lookahead = max(0, min(MAX_LOOKAHEAD, lookahead))
+        self.max_memory_mb = max_memory_mb
+        self.browser_memory_mb = browser_memory_mb
+        self._idle = []
+        self._spares = []  # Futures of browsers starting in the background
+        self._live = 0  # Browsers currently running: in use, idle or spare
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.lookahead, thread_name_prefix="driver-prefetch") if self.lookahead else None
+
+    def acquire(self):
+        """Returns a clean driver: an idle one, else a pre-warmed spare, else a newly started one."""
+        start = time.perf_counter()
+        with self._lock:
+            driver = self._idle.pop() if self._idle else None
+            spare = self._spares.pop(0) if driver is None and self._spares else None
+        source = "idle"
+
+        if spare is not None:
+            source = "spare"
+            try:
+                driver = spare.result()
+            except Exception as e:
+                logging.warning(f"⚠️ Background browser failed to start: {e}")
+                self._forget()
+        if driver is not None and not self._is_alive(driver):
+            logging.warning("⚠️ Pooled browser crashed. Restarting it.")
+            try:
+                driver = restart_driver(driver)
+            except Exception:
+                self._forget()  # restart_driver already quit the crashed browser
+                raise
+            driver.pool_uses = 0
+        if driver is None:
+            source = "new"
+            driver = self._start_browser()
+
+        if self.isolation == "context":
+            try:
+                open_browser_context(driver)
+            except Exception:
+                # The browser is neither handed out nor back in the pool, so it must not keep its slot
+                self._quit(driver)
+                self._top_up()
+                raise
+        driver.pool_uses += 1
+        logging.info(f"🚗 Browser ready in {time.perf_counter() - start:.2f}s ({source}, {self.isolation} isolation).")
+        self._top_up()
+        return driver
+
+    def release(self, driver, urls=None):
+        """
+        Gives a driver back to the pool, resetting its state for the next test.
+
+        Browsers that reached `max_uses` or fail to reset (e.g. after a crash) are quit instead.
+        """
+        if driver.pool_uses >= self.max_uses:
+            self._quit(driver)
+            self._top_up()
+            return
+
+        origins = {EVERGAGE_ORIGIN}
+        for url in (urls or {}).values():
+            if url and url.startswith("http"):
+                parts = urlsplit(url)
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+        try:
+            if self.isolation == "context":
+                close_browser_context(driver)
+            else:
+                reset_driver_state(driver, origins)
+        except Exception as e:
+            logging.warning(f"⚠️ Failed to reset pooled browser, discarding it: {e}")
+            self._quit(driver)
+            self._top_up()
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def close(self):
+        """Quits every idle and spare browser."""
+        with self._lock:
+            drivers, self._idle = self._idle, []
+            spares, self._spares = self._spares, []
+        for spare in spares:
+            try:
+                drivers.append(spare.result())
+            except Exception:
+                self._forget()
+        for driver in drivers:
+            self._quit(driver)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _top_up(self):
+        """Starts spare browsers in the background until `lookahead` browsers are ready or the memory budget is used."""
+        if self._executor is None:
+            return
+        with self._lock:
+            while (len(self._idle) + len(self._spares) < self.lookahead
+                   and (self._live + 1) * self.browser_memory_mb <= self.max_memory_mb):
+                self._live += 1
+                self._spares.append(self._executor.submit(self._create))
+
+    def _start_browser(self):
+        with self._lock:
+            self._live += 1
+        try:
+            return self._create()
+        except Exception:
+            self._forget()
+            raise
+
+    def _create(self):
+        driver = create_driver(build_chrome_options())
+        driver.pool_uses = 0
+        return driver
+
+    def _forget(self):
+        with self._lock:
+            self._live -= 1
+
+    def _is_alive(self, driver):
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        self._forget()
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"⚠️ Failed to quit the browser: {e}")
+        release_browser_profile(getattr(driver, "options", None))
+
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Returns this worker's DriverPool, configured from the BROWSER_* variables exported by conftest.py."""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = DriverPool(
+                max_uses=int(os.environ.get("BROWSER_POOL_MAX_USES", DEFAULT_POOL_MAX_USES)),
+                lookahead=int(os.environ.get("BROWSER_LOOKAHEAD", DEFAULT_LOOKAHEAD)),
+                max_memory_mb=int(os.environ.get("BROWSER_MAX_MEMORY_MB", DEFAULT_MAX_MEMORY_MB)),
+                browser_memory_mb=int(os.environ.get("BROWSER_MEMORY_MB", DEFAULT_BROWSER_MEMORY_MB)),
+                isolation=os.environ.get("BROWSER_ISOLATION", "process"),
+            )
+            atexit.register(_driver_pool.close)
+        return _driver_pool
+
+
+def shutdown_driver_pool():
+    """Quits the browsers kept by this worker's pool and logs the browser startup times."""
+    if _driver_pool is not None:
+        _driver_pool.close()
+    with _startup_times_lock:
+        startup_times = sorted(_startup_times)
+    if startup_times:
+        logging.info(
+            f"🚗 Chrome startup: {len(startup_times)} launches, mean {sum(startup_times) / len(startup_times):.2f}s, "
+            f"p50 {startup_times[len(startup_times) // 2]:.2f}s, max {startup_times[-1]:.2f}s."
+        )
+
+
 @pytest.fixture
 def driver():
     """Pytest fixture to initialize and clean up the WebDriver."""
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import time
+from contextlib import closing
+
+import requests
+
+from App.SQLiteStore import SQLiteStore
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "deeplinks.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # Deeplinks change roughly once a week
+
+
+class DeeplinkCache(SQLiteStore):
+    """Persistent SQLite cache for deeplinks API responses, shared by every pytest run and xdist worker."""
+
+    SCHEMA = ("""
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            market_code TEXT NOT NULL,
+            body TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL
+        )
+    """,)
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, market_ttls=None, refresh_after=0.0):
+        """
+        Initializes the cache and creates the database file if needed.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            ttl_seconds (float): Seconds a cached response stays fresh.
+            market_ttls (dict): Optional per-market TTL overrides, e.g. {"FR/fr": 3600}.
+            refresh_after (float): Entries fetched before this timestamp are treated as stale.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.market_ttls = market_ttls or {}
+        self.refresh_after = refresh_after
+        super().__init__(path)
+
+    @classmethod
+    def from_env(cls):
+        """Builds a cache from the DEEPLINK_CACHE_* variables exported by conftest.py."""
+        return cls(
+            path=os.environ.get("DEEPLINK_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl_seconds=float(os.environ.get("DEEPLINK_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            market_ttls=json.loads(os.environ.get("DEEPLINK_CACHE_MARKET_TTLS", "{}")),
+            refresh_after=float(os.environ.get("DEEPLINK_REFRESH_AFTER", 0)),
+        )
+
+    def ttl_for(self, market_code):
+        """Returns the TTL in seconds for the given market code."""
+        return float(self.market_ttls.get(market_code, self.ttl_seconds))
+
+    def lookup(self, url):
+        """Returns the cached entry for a URL, or None if it has never been stored."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT market_code, body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        market_code, body, etag, last_modified, fetched_at = row
+        return {
+            "market_code": market_code,
+            "data": json.loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def is_fresh(self, entry):
+        """Checks whether a cached entry can be served without contacting the API."""
+        if entry["fetched_at"] < self.refresh_after:
+            return False
+        return time.time() - entry["fetched_at"] < self.ttl_for(entry["market_code"])
+
+    def store(self, url, market_code, data, etag=None, last_modified=None):
+        """Stores (or replaces) the response for a URL."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (url, market_code, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, market_code, json.dumps(data), etag, last_modified, time.time()),
+            )
+
+    def touch(self, url):
+        """Marks a revalidated entry as fresh again."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def get_json(self, url, market_code, headers, getter=requests.get):
+        """
+        Returns the JSON payload for a URL, serving it from the cache while it is fresh.
+
+        Stale entries are revalidated with If-None-Match / If-Modified-Since when the API
+        provided an ETag or Last-Modified header.
+
+        Returns:
+            tuple: (status_code, data). `data` is None when the request did not succeed.
+        """
+        entry = self.lookup(url)
+        if entry and self.is_fresh(entry):
+            logging.info(f"📦 Deeplinks cache hit: {url}")
+            return 200, entry["data"]
+
+        request_headers = dict(headers)
+        if entry and entry["fetched_at"] >= self.refresh_after:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = getter(url, headers=request_headers)
+
+        if response.status_code == 304 and entry:
+            logging.info(f"📦 Deeplinks cache revalidated: {url}")
+            self.touch(url)
+            return 200, entry["data"]
+
+        if response.status_code != 200:
+            return response.status_code, None
+
+        data = response.json()
+        self.store(url, market_code, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return 200, data
@@ -0,0 +1,258 @@
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 4  # Number of hosts kept in the pool
+DEFAULT_POOL_MAXSIZE = 16  # Keep-alive connections per host
+DEFAULT_PER_HOST_LIMIT = 8  # Concurrent requests allowed against a single host
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RATE_LIMIT = 20  # Requests per second allowed by the token bucket
+DEFAULT_BURST = 20  # Requests that may be sent at once when the bucket is full
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5  # Seconds; doubled on every retry
+DEFAULT_BACKOFF_MAX = 30
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces out requests to a steady rate."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpClient:
+    """Pooled keep-alive HTTP client shared by VehicleAPI and ModelCodesAPI."""
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, http2=False, rate_limit=DEFAULT_RATE_LIMIT,
+                 burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX):
+        """
+        Initializes the connection pool.
+
+        Args:
+            pool_connections (int): Number of per-host pools to keep.
+            pool_maxsize (int): Keep-alive connections kept per host.
+            per_host_limit (int): Concurrent requests allowed against a single host.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait for the response.
+            http2 (bool): Use HTTP/2 through httpx when it is installed (`pip install httpx[http2]`).
+            rate_limit (float): Requests per second allowed by the token bucket. 0 disables rate limiting.
+            burst (int): Requests that may be sent at once when the bucket is full.
+            max_retries (int): Retries for throttled (429/503), failing gateway (502/504) and connection errors.
+            backoff_base (float): Initial backoff in seconds, doubled on every retry and jittered.
+            backoff_max (float): Upper bound for a single backoff or Retry-After wait.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.per_host_limit = per_host_limit
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.counters = {"requests": 0, "throttled": 0, "retried": 0, "dropped": 0}
+        self._httpx_client = None
+        self._session = None
+        self._host_semaphores = {}
+        self._latencies = []
+        self._lock = threading.Lock()
+
+        if http2:
+            try:
+                import httpx
+                self._httpx_client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=pool_connections * pool_maxsize, max_keepalive_connections=pool_maxsize),
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                )
+            except ImportError:
+                logging.warning("⚠️ HTTP/2 requested but httpx[http2] is not installed. Falling back to HTTP/1.1.")
+
+        if self._httpx_client is None:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls):
+        """Builds a client from the HTTP_CLIENT_* variables exported by conftest.py."""
+        return cls(
+            pool_maxsize=int(os.environ.get("HTTP_CLIENT_POOL_SIZE", DEFAULT_POOL_MAXSIZE)),
+            per_host_limit=int(os.environ.get("HTTP_CLIENT_PER_HOST_LIMIT", DEFAULT_PER_HOST_LIMIT)),
+            connect_timeout=float(os.environ.get("HTTP_CLIENT_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(os.environ.get("HTTP_CLIENT_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            http2=os.environ.get("HTTP_CLIENT_HTTP2") == "1",
+            rate_limit=float(os.environ.get("HTTP_CLIENT_RATE_LIMIT", DEFAULT_RATE_LIMIT)),
+            max_retries=int(os.environ.get("HTTP_CLIENT_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+        )
+
+    def get(self, url, headers=None):
+        """
+        Sends a rate-limited GET request through the shared pool, retrying throttled and failed requests.
+
+        Retries wait for the server's Retry-After when present, otherwise for a jittered exponential backoff.
+        Once retries are exhausted the last response is returned (or the last error raised) and the request
+        is counted as dropped.
+
+        Raises:
+            requests.exceptions.RequestException: On connection errors and timeouts, for both transports.
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self._send(url, headers)
+            except requests.exceptions.RequestException as e:
+                if last_attempt:
+                    self._count("dropped")
+                    raise
+                wait = self._backoff(attempt)
+                logging.warning(f"⚠️ GET {url} failed ({e}). Retrying in {wait:.1f}s...")
+            else:
+                if response.status_code in (429, 503):
+                    self._count("throttled")
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                if last_attempt:
+                    self._count("dropped")
+                    logging.error(f"❌ GET {url} still returned {response.status_code} after {self.max_retries} retries.")
+                    return response
+                wait = self._retry_after(response) or self._backoff(attempt)
+                logging.warning(f"⚠️ GET {url} returned {response.status_code}. Retrying in {wait:.1f}s...")
+            self._count("retried")
+            time.sleep(wait)
+
+    def get_json(self, url, headers=None, cache=None, market_code=None):
+        """
+        Returns (status_code, data) for a GET request, going through `cache` (a DeeplinkCache) when one is given.
+
+        `data` is None when the request did not succeed. `market_code` selects the cache TTL.
+        """
+        if cache:
+            return cache.get_json(url, market_code, headers, getter=self.get)
+        response = self.get(url, headers=headers)
+        return response.status_code, response.json() if response.status_code == 200 else None
+
+    def _send(self, url, headers):
+        """Sends a single GET request and records its latency."""
+        if self.bucket:
+            self.bucket.acquire()
+        start = time.perf_counter()
+        with self._host_slot(url):
+            if self._httpx_client is not None:
+                import httpx
+                try:
+                    response = self._httpx_client.get(url, headers=headers)
+                except httpx.HTTPError as e:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+            else:
+                response = self._session.get(url, headers=headers, timeout=self.timeout)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._latencies.append(elapsed)
+            self.counters["requests"] += 1
+        logging.debug(f"🌐 GET {url} -> {response.status_code} in {elapsed * 1000:.0f} ms")
+        return response
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response):
+        """Returns the wait requested by a Retry-After header (seconds or HTTP date), or None."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(self.backoff_max, max(0.0, seconds))
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self):
+        """Returns the request, throttled, retried and dropped counters."""
+        with self._lock:
+            return dict(self.counters)
+
+    def latency_summary(self):
+        """Returns count, mean, p50, p95 and max request latency in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+
+    def log_summary(self):
+        """Logs the latency summary and rate-limit counters of every request sent so far."""
+        logging.info(f"🌐 Deeplinks API latency: {self.latency_summary()}")
+        logging.info(f"🌐 Deeplinks API requests: {self.stats()}")
+
+    def close(self):
+        """Closes every pooled connection."""
+        if self._httpx_client is not None:
+            self._httpx_client.close()
+        if self._session is not None:
+            self._session.close()
+
+    @contextmanager
+    def _host_slot(self, url):
+        """Limits the number of concurrent requests sent to the host of `url`."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._host_semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host_limit))
+        with semaphore:
+            yield
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """Returns the process-wide HttpClient, creating it from the environment on first use."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient.from_env()
+        return _shared_client
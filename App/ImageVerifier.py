@@ -2,9 +2,9 @@ import logging
 import allure
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pytest
+from App.StepTimings import AdaptiveWait
 
 class ImageVerifier:
     def __init__(self, driver: WebDriver):
@@ -16,7 +16,7 @@ class ImageVerifier:
         """
         try:
             # Wait for at least one image to be present
-            WebDriverWait(self.driver, timeout).until(
+            AdaptiveWait(self.driver, "personalized_image", timeout).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, selector))
             )
             images = self.driver.find_elements(By.CSS_SELECTOR, selector)
@@ -0,0 +1,97 @@
+import json
+import logging
+import uuid
+
+STORAGE_PREFIX = "__evergageResponses:"
+MAX_RECORDED_RESPONSES = 100  # Per origin and tab, the oldest are dropped first
+
+# Wraps fetch and XMLHttpRequest before any page script runs and appends every response from
+# the target host to sessionStorage, which survives the journey's same-origin navigations.
+RECORDER_SCRIPT = """
+(() => {
+    const urlFilter = %(url_filter)s;
+    const key = %(key)s;
+    const maxResponses = %(max_responses)d;
+    try {
+        for (const name of Object.keys(sessionStorage)) {
+            if (name.startsWith(%(prefix)s) && name !== key) sessionStorage.removeItem(name);
+        }
+    } catch (e) { return; }
+
+    const record = (url, status, body) => {
+        try {
+            const store = JSON.parse(sessionStorage.getItem(key) || '{"next": 0, "responses": []}');
+            store.responses.push({seq: store.next++, url: String(url), status: status, body: body});
+            store.responses = store.responses.slice(-maxResponses);
+            sessionStorage.setItem(key, JSON.stringify(store));
+        } catch (e) {}
+    };
+
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function (...args) {
+            const url = args[0] instanceof Request ? args[0].url : String(args[0]);
+            const promise = originalFetch.apply(this, args);
+            if (url.includes(urlFilter)) {
+                promise.then(response => response.clone().text().then(body => record(url, response.status, body))).catch(() => {});
+            }
+            return promise;
+        };
+    }
+
+    const originalOpen = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url, ...rest) {
+        if (String(url).includes(urlFilter)) {
+            this.addEventListener("load", () => {
+                const body = this.responseType === "" || this.responseType === "text" ? this.responseText : null;
+                record(this.responseURL || url, this.status, body);
+            });
+        }
+        return originalOpen.call(this, method, url, ...rest);
+    };
+})();
+"""
+
+
+class InPageRecorder:
+    """
+    Records target responses inside the page instead of fetching their bodies over CDP.
+
+    The recorder script is registered with Page.addScriptToEvaluateOnNewDocument, so it wraps
+    fetch/XHR on every document of the tab. All recorded responses are then read with a single
+    execute_script call. sessionStorage is per origin: responses recorded on another origin of
+    the journey are only visible while the browser is on that origin.
+    """
+
+    def __init__(self, driver, url_filter):
+        self.driver = driver
+        self.url_filter = url_filter
+        self.key = f"{STORAGE_PREFIX}{uuid.uuid4().hex}"  # A previous test in the same tab never leaks in
+        self._script_id = None
+        self._next_seq = 0  # Sequence number of the first response not returned by drain() yet
+
+    def start(self):
+        script = RECORDER_SCRIPT % {
+            "url_filter": json.dumps(self.url_filter),
+            "key": json.dumps(self.key),
+            "prefix": json.dumps(STORAGE_PREFIX),
+            "max_responses": MAX_RECORDED_RESPONSES,
+        }
+        self.driver.execute_cdp_cmd("Page.enable", {})
+        self._script_id = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+        logging.info(f"🌐 Recording responses in the page for: {self.url_filter}")
+
+    def drain(self):
+        """Returns the responses recorded since the last call, as dicts with `url`, `status` and `body`."""
+        stored = self.driver.execute_script("return window.sessionStorage.getItem(arguments[0]);", self.key)
+        responses = json.loads(stored)["responses"] if stored else []
+        new_responses = [response for response in responses if response["seq"] >= self._next_seq]
+        if new_responses:
+            self._next_seq = new_responses[-1]["seq"] + 1
+        return new_responses
+
+    def stop(self):
+        """Unregisters the recorder script, so the next test in this tab starts without it."""
+        if self._script_id is not None:
+            self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": self._script_id})
+            self._script_id = None
@@ -0,0 +1,71 @@
+import logging
+import threading
+from collections import deque
+
+DEFAULT_DRAIN_INTERVAL = 1.0  # Seconds between two reads of the performance log
+DEFAULT_BUFFER_SIZE = 500  # Entries kept after filtering
+
+
+class PerformanceLogDrainer:
+    """
+    Empties Chrome's performance log in a background thread into a bounded ring buffer.
+
+    ChromeDriver buffers performance entries until they are read, so long journeys keep growing
+    both Chrome's and ChromeDriver's memory. The drainer reads the log every `interval` seconds,
+    keeps only the entries accepted by `keep` (a cheap check on the raw message string) and
+    hands every kept entry out exactly once through a cursor.
+    """
+
+    def __init__(self, driver, keep, interval=DEFAULT_DRAIN_INTERVAL, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.driver = driver
+        self.keep = keep
+        self.interval = interval
+        self.dropped = 0  # Kept entries evicted from the buffer before they were read
+        self._buffer = deque(maxlen=buffer_size)  # (sequence, entry)
+        self._sequence = 0
+        self._cursor = 0  # Sequence of the last entry handed out
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="perf-log-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+
+    def read_new(self):
+        """Drains the log once more and returns the kept entries not returned by a previous call."""
+        self.drain()
+        with self._lock:
+            entries = [entry for sequence, entry in self._buffer if sequence > self._cursor]
+            self._cursor = self._sequence
+        return entries
+
+    def drain(self):
+        """Reads the performance log once and buffers the entries accepted by `keep`."""
+        with self._drain_lock:
+            entries = self.driver.get_log("performance")
+        kept = [entry for entry in entries if self.keep(entry["message"])]
+        dropped = 0
+        with self._lock:
+            for entry in kept:
+                if len(self._buffer) == self._buffer.maxlen and self._buffer[0][0] > self._cursor:
+                    dropped += 1
+                self._sequence += 1
+                self._buffer.append((self._sequence, entry))
+            self.dropped += dropped
+        if dropped:
+            logging.warning(f"⚠️ Performance log buffer full: {dropped} unread entries dropped.")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.drain()
+            except Exception as e:
+                logging.warning(f"⚠️ Stopped draining the performance log: {e}")
+                return
@@ -0,0 +1,122 @@
+import logging
+import time
+
+from App.XHRResponseCapturer import CampaignTimeoutError
+
+NOT_DECIDED = "not_decided"  # No campaign decision has arrived yet
+CONTROL = "control"  # Evergage put the visitor in the control group
+PERSONALIZED = "personalized"  # The module shows the expected personalized image
+WRONG = "wrong"  # Evergage decided, but the module does not show the expected image
+
+HP_CAMPAIGNS_SELECTOR = "[data-component-name='hp-campaigns']"
+DEFAULT_PROBE_TIMEOUT = 10  # Seconds, the image wait this probe replaces
+RENDER_GRACE_PERIOD = 2  # Seconds the page gets to render a decision before it is called wrong
+PROBE_POLL_INTERVAL = 0.25
+
+IMAGES_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0] + ' img')).map(img => ({
+    src: img.src,
+    loaded: img.complete && img.naturalHeight !== 0,
+}));
+"""
+
+
+class PersonalizationProbe:
+    """
+    Resolves as soon as Evergage has decided the experience and the campaign module shows it.
+
+    The decision comes from the campaign response captured by XHRResponseCapturer, the render
+    from the images of the campaign module. Both are polled together, so a test continues at the
+    real decision time and a module that was never personalized is told apart from one that
+    was personalized with the wrong experience.
+    """
+
+    def __init__(self, driver, xhr_capturer, expected_src, selector=HP_CAMPAIGNS_SELECTOR):
+        """
+        Args:
+            driver: WebDriver instance.
+            xhr_capturer: XHRResponseCapturer of the test, with its campaign name substring set.
+            expected_src (str): Path contained in the src of the personalized image.
+            selector (str): CSS selector of the campaign module.
+        """
+        self.driver = driver
+        self.xhr_capturer = xhr_capturer
+        self.expected_src = expected_src
+        self.selector = selector
+
+    def wait(self, timeout=DEFAULT_PROBE_TIMEOUT):
+        """
+        Waits for the decision, then polls the module until the outcome is known or `timeout` elapses.
+
+        PERSONALIZED needs both the captured decision and the image, so a module that already shows
+        the expected image is still reported NOT_DECIDED when no decision arrives within `timeout`.
+        Once decided, the module gets at least RENDER_GRACE_PERIOD to render it.
+
+        Returns:
+            dict: `state` (NOT_DECIDED, CONTROL, PERSONALIZED or WRONG), the decided `campaign`,
+            `experience` and `user_group` (None when not decided), the module's `image_srcs`,
+            whether all of them are `rendered`, and the `elapsed` seconds.
+        """
+        start = time.monotonic()
+        try:
+            self.xhr_capturer.wait_for_campaign(timeout=timeout)
+        except CampaignTimeoutError as e:
+            logging.warning(str(e))
+            result = self.check()
+            result["elapsed"] = round(time.monotonic() - start, 2)
+            logging.info(f"🔍 Personalization {result['state']} after {result['elapsed']}s.")
+            return result
+
+        decided_at = time.monotonic()
+        deadline = max(start + timeout, decided_at + RENDER_GRACE_PERIOD)
+        while True:
+            result = self.check()
+            now = time.monotonic()
+            result["elapsed"] = round(now - start, 2)
+            if result["state"] in (CONTROL, PERSONALIZED):
+                break
+            # The module may still be rendering the decision, so a wrong result only ends the wait after a grace period
+            if result["state"] == WRONG and result["rendered"] and now - decided_at >= RENDER_GRACE_PERIOD:
+                break
+            if now >= deadline:
+                break
+            time.sleep(PROBE_POLL_INTERVAL)
+
+        logging.info(f"🔍 Personalization {result['state']} after {result['elapsed']}s: "
+                     f"campaign '{result['campaign']}', experience '{result['experience']}'.")
+        return result
+
+    def check(self):
+        """
+        Returns the current outcome, as in wait(), without waiting.
+
+        A decision not shown yet counts as WRONG, a matching image without a captured decision as NOT_DECIDED.
+        """
+        campaign = self.xhr_capturer.poll_campaign()
+        try:
+            images = self.driver.execute_script(IMAGES_SCRIPT, self.selector) or []
+        except Exception as e:
+            logging.warning(f"⚠️ Could not read the images of {self.selector}: {e}")
+            images = []
+
+        personalized = any(image["loaded"] and self.expected_src in (image["src"] or "") for image in images)
+        rendered = bool(images) and all(image["loaded"] for image in images)
+        if campaign is not None and ("Control Group" in campaign.get("experienceName", "")
+                                     or campaign.get("userGroup", "").lower() == "control"):
+            state = CONTROL
+        elif campaign is None:
+            # Without a captured decision the control check has nothing to go on, so a matching image alone is not enough
+            state = NOT_DECIDED
+        elif personalized:
+            state = PERSONALIZED
+        else:
+            state = WRONG
+
+        return {
+            "state": state,
+            "campaign": campaign.get("campaignName") if campaign else None,
+            "experience": campaign.get("experienceName") if campaign else None,
+            "user_group": campaign.get("userGroup") if campaign else None,
+            "image_srcs": [image["src"] for image in images],
+            "rendered": rendered,
+        }
@@ -0,0 +1,72 @@
+import logging
+import os
+
+import allure
+
+# Journey steps only need the page scripts and the Evergage tracking calls, not the media.
+# The trailing * also matches URLs with a query string or fragment, e.g. AEM image renditions.
+MEDIA_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.webp*", "*.avif*", "*.gif*", "*.svg*",
+    "*.mp4*", "*.webm*", "*.m3u8*",
+    "*.woff*", "*.ttf*", "*.otf*",
+]
+THIRD_PARTY_PATTERNS = [
+    "*doubleclick.net*",
+    "*google-analytics.com*",
+    "*googleadservices.com*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*hotjar.com*",
+    "*bing.com/bat*",
+    "*linkedin.com/px*",
+    "*youtube.com/embed*",
+]
+PHASES = {
+    "journey": MEDIA_PATTERNS + THIRD_PARTY_PATTERNS,  # Pages visited only to generate tracking events
+    "verify": [],  # Final page: full rendering for the personalization check and the screenshot
+}
+
+
+def resource_blocking_enabled():
+    """Checks the RESOURCE_BLOCKING variable exported by conftest.py (`--no-resource-blocking` disables it)."""
+    return os.environ.get("RESOURCE_BLOCKING", "1") != "0"
+
+
+def blocked_patterns(phase):
+    """
+    Returns the Network.setBlockedURLs patterns of a phase.
+
+    setBlockedURLs has no allow rules, so a media pattern also blocks media served by Evergage;
+    its scripts and API calls match none of the patterns.
+    """
+    return list(PHASES[phase])
+
+
+def set_resource_phase(driver, phase):
+    """
+    Applies the resource policy of a journey phase to the current page target.
+
+    The Network domain must already be enabled, which XHRResponseCapturer does when it is created.
+
+    Args:
+        driver: WebDriver instance.
+        phase (str): "journey" blocks heavy media and non-essential third parties, "verify" restores full rendering.
+    """
+    if phase not in PHASES:
+        raise ValueError(f"❌ Unknown resource phase '{phase}'. Expected one of: {', '.join(PHASES)}")
+    if not resource_blocking_enabled():
+        return
+
+    if getattr(driver, "resource_phase", None) == phase:
+        return
+    patterns = blocked_patterns(phase)
+    with allure.step(f"🧱 Resource policy: {phase} ({len(patterns)} blocked patterns)"):
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        driver.resource_phase = phase
+        logging.info(f"🧱 Resource policy set to '{phase}' ({len(patterns)} blocked patterns).")
+
+
+def clear_resource_policy(driver):
+    """Removes every blocked URL pattern, e.g. before a pooled browser serves the next test."""
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    driver.resource_phase = None
@@ -0,0 +1,22 @@
+import os
+import sqlite3
+from contextlib import closing
+
+
+class SQLiteStore:
+    """Base of the persistent SQLite stores shared by every pytest run, thread and xdist worker."""
+
+    SCHEMA = ()  # CREATE statements run when the store is opened
+
+    def __init__(self, path):
+        """Creates the database file and its schema if needed."""
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    def _connect(self):
+        # A short-lived connection per operation keeps the store safe across threads and processes
+        return sqlite3.connect(self.path, timeout=30)
@@ -1,7 +1,7 @@
 import os
-import time
 from selenium.webdriver.common.by import By
 import allure
+from App.Waits import element_stable, scroll_settled, wait_until
 
 class ScreenshotHandler:
     def __init__(self, driver, screenshot_dir):
@@ -28,7 +28,7 @@ class ScreenshotHandler:
                 try:
                     element = self.driver.find_element(By.CSS_SELECTOR, "[data-component-name='hp-campaigns']")
                     self.driver.execute_script("arguments[0].scrollIntoView({block: 'start'});", element)
-                    time.sleep(1)
+                    wait_until(self.driver, element_stable("[data-component-name='hp-campaigns']"), 1)
                     allure.attach("✅ Scrolled to [data-component-name='hp-campaigns'].", name="Scroll Info", attachment_type=allure.attachment_type.TEXT)
                 except Exception as e:
                     allure.attach(f"❌ Error: {e}", name="Scroll Error", attachment_type=allure.attachment_type.TEXT)
@@ -38,13 +38,13 @@ class ScreenshotHandler:
                     if ".fr" in urls['HOME_PAGE']:
                         hp_element = self.driver.find_element(By.CSS_SELECTOR, 'body > div.root.responsivegrid.owc-content-container > div > div.responsivegrid.ng-content-root.aem-GridColumn.aem-GridColumn--default--12 > div > div:nth-child(13) > div > div.wb-grid-container > h2')
                         self.driver.execute_script("arguments[0].scrollIntoView({block: 'start'});", hp_element)
-                        time.sleep(2)
+                        wait_until(self.driver, scroll_settled(), 2)
                         allure.attach("Scrolled to the French market-specific element.", name="Scroll Info (FR)", attachment_type=allure.attachment_type.TEXT)
 
                     if ".hu" in urls['HOME_PAGE']:
                         hp_element = self.driver.find_element(By.CSS_SELECTOR, 'body > div.root.responsivegrid.owc-content-container > div > div.responsivegrid.ng-content-root.aem-GridColumn.aem-GridColumn--default--12 > div > div:nth-child(11) > div > div.wb-grid-container > h2')
                         self.driver.execute_script("arguments[0].scrollIntoView({block: 'start'});", hp_element)
-                        time.sleep(2)
+                        wait_until(self.driver, scroll_settled(), 2)
                         allure.attach("✅ Scrolled to the Hungarian market-specific element.", name="Scroll Info (HU)", attachment_type=allure.attachment_type.TEXT)
                 except Exception as e:
                     allure.attach(f"Error: {e}", name="Market Scroll Error", attachment_type=allure.attachment_type.TEXT)
@@ -0,0 +1,146 @@
+import logging
+import math
+import os
+import time
+from contextlib import closing
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from App.SQLiteStore import SQLiteStore
+
+DEFAULT_TIMINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "step-timings.sqlite")
+DEFAULT_TIMEOUT_MARGIN = 2.0  # Learned timeout = p99 of the recorded times x margin
+MIN_SAMPLES = 20  # Below this many recorded runs a step keeps its constant timeout
+MAX_SAMPLES = 200  # Newest runs kept per market and step
+MIN_TIMEOUT = 3  # Seconds; a learned timeout is never shorter
+MAX_TIMEOUT_FACTOR = 3  # A learned timeout is never longer than this many times the constant
+
+_current_market = None
+_step_timings = None
+
+
+class StepTimings(SQLiteStore):
+    """Persistent SQLite store of per-market, per-step completion times, used to learn wait timeouts."""
+
+    SCHEMA = ("""
+        CREATE TABLE IF NOT EXISTS timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            market_code TEXT NOT NULL,
+            step TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            recorded_at REAL NOT NULL
+        )
+    """, "CREATE INDEX IF NOT EXISTS timings_market_step ON timings (market_code, step, id)")
+
+    def __init__(self, path=DEFAULT_TIMINGS_PATH, margin=DEFAULT_TIMEOUT_MARGIN, adaptive=True):
+        """
+        Initializes the store and creates the database file if needed.
+
+        Args:
+            path (str): Location of the SQLite database file.
+            margin (float): Multiplier applied to the p99 completion time.
+            adaptive (bool): When False, times are still recorded but the constant timeouts are used.
+        """
+        self.margin = margin
+        self.adaptive = adaptive
+        super().__init__(path)
+
+    @classmethod
+    def from_env(cls):
+        """Builds a store from the STEP_TIMINGS_* variables exported by conftest.py."""
+        return cls(
+            path=os.environ.get("STEP_TIMINGS_PATH", DEFAULT_TIMINGS_PATH),
+            margin=float(os.environ.get("STEP_TIMINGS_MARGIN", DEFAULT_TIMEOUT_MARGIN)),
+            adaptive=os.environ.get("STEP_TIMINGS_ADAPTIVE", "1") != "0",
+        )
+
+    def record(self, market_code, step, seconds):
+        """Stores one completion time and drops the oldest beyond MAX_SAMPLES."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO timings (market_code, step, seconds, recorded_at) VALUES (?, ?, ?, ?)",
+                (market_code, step, seconds, time.time()),
+            )
+            connection.execute("""
+                DELETE FROM timings WHERE market_code = ? AND step = ? AND id NOT IN (
+                    SELECT id FROM timings WHERE market_code = ? AND step = ? ORDER BY id DESC LIMIT ?
+                )
+            """, (market_code, step, market_code, step, MAX_SAMPLES))
+
+    def timeout_for(self, market_code, step, default):
+        """
+        Returns the timeout for a step in a market: p99 of its recorded times x margin.
+
+        Falls back to `default` without enough history, and stays between MIN_TIMEOUT and
+        MAX_TIMEOUT_FACTOR x `default`.
+        """
+        if not self.adaptive or market_code is None:
+            return default
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT seconds FROM timings WHERE market_code = ? AND step = ? ORDER BY seconds",
+                (market_code, step),
+            ).fetchall()
+        if len(rows) < MIN_SAMPLES:
+            return default
+        p99 = rows[math.ceil(0.99 * len(rows)) - 1][0]
+        timeout = min(max(p99 * self.margin, MIN_TIMEOUT), default * MAX_TIMEOUT_FACTOR)
+        logging.info(f"⏳ {step} timeout for {market_code}: {timeout:.1f}s (p99 {p99:.1f}s over {len(rows)} runs, constant {default}s).")
+        return timeout
+
+
+def get_step_timings():
+    """Returns this process's StepTimings store, created from the environment on first use."""
+    global _step_timings
+    if _step_timings is None:
+        _step_timings = StepTimings.from_env()
+    return _step_timings
+
+
+def set_current_market(market_code):
+    """Sets the market the following waits are timed and learned for (called by test_run)."""
+    global _current_market
+    _current_market = market_code
+
+
+def adaptive_timeout(step, default):
+    """Returns the learned timeout of `step` for the current market, or `default`."""
+    return get_step_timings().timeout_for(_current_market, step, default)
+
+
+class AdaptiveWait:
+    """
+    WebDriverWait whose timeout is learned for `step` in the current market.
+
+    Every wait records the wall-clock time from its start until it ended, so the next runs of the
+    market learn from it. A wait that times out is recorded the same way, so failures push the
+    learned timeout up instead of being ignored. `ignored_exceptions` are passed on to WebDriverWait.
+    """
+
+    def __init__(self, driver, step, default_timeout, poll_frequency=0.5, ignored_exceptions=None):
+        self.driver = driver
+        self.step = step
+        self.timeout = adaptive_timeout(step, default_timeout)
+        self.poll_frequency = poll_frequency
+        self.ignored_exceptions = ignored_exceptions
+
+    def until(self, method, message=""):
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, self.timeout, poll_frequency=self.poll_frequency,
+                                   ignored_exceptions=self.ignored_exceptions).until(method, message)
+        except TimeoutException:
+            # The step took at least the whole timeout; without this sample the history only keeps the fast runs
+            self._record(time.monotonic() - start)
+            raise
+        self._record(time.monotonic() - start)
+        return result
+
+    def _record(self, seconds):
+        if _current_market is None:
+            return
+        try:
+            get_step_timings().record(_current_market, self.step, seconds)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not record the time of {self.step}: {e}")
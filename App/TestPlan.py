@@ -0,0 +1,150 @@
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import pytest
+from App.DeeplinkCache import DeeplinkCache
+from App.vehicle_api import VehicleAPI
+
+LIVE_TEST_QUERY = "?usecaselivetest=true"  # Marks HOME_PAGE visits as live tests for the personalization team
+SESSION_PLAN_KEY = pytest.StashKey[list]()
+PLAN_SNAPSHOT_VERSION = 1
+
+
+def case_uid(test_name, market_code, model_code):
+    """Returns the stable Allure id of a test case."""
+    uid_raw = f"{test_name}_{market_code}_{model_code or 'unknown'}"
+    return hashlib.md5(uid_raw.encode()).hexdigest()
+
+
+def build_test_plan(entries, vehicle_api):
+    """
+    Resolves the requested test entries into runnable test cases.
+
+    Several test types usually share the same market/model, so every distinct
+    (market_code, model_code) lookup is fetched exactly once and its result is
+    fanned out to each entry that needs it.
+
+    Args:
+        entries (list): Dicts with `test_name`, `market_code` and an optional `model_code`.
+            Entries without a model_code cover every model of the market.
+        vehicle_api (VehicleAPI): API used to fetch the deeplinks.
+
+    Returns:
+        list: The entries (resolved when they name a model) followed by one case per model of the market-wide entries.
+    """
+    lookups = list(dict.fromkeys((entry["market_code"], entry.get("model_code")) for entry in entries))
+    logging.info(f"🧭 Planning {len(entries)} test entries with {len(lookups)} unique deeplinks lookups.")
+    matrix = vehicle_api.fetch_matrix(lookups)
+
+    manual_test_cases = []
+    dynamic_test_cases = []
+    for entry in entries:
+        market_code = entry["market_code"]
+        model_code = entry.get("model_code", None)
+        case = dict(entry, allure_uid=case_uid(entry["test_name"], market_code, model_code))
+        manual_test_cases.append(case)
+
+        # Every entry gets its own copies of the shared lookup result
+        fetched_cases = vehicle_api.build_test_cases(entry["test_name"], market_code, matrix[(market_code, model_code)])
+        if not fetched_cases:
+            logging.warning(f"⚠️ No URLs found for manual case: {entry}")
+            if not model_code:
+                # The market listing failed; keep the entry so the missing market shows up as a failure
+                case["fetch_error"] = f"No models could be fetched for market '{market_code}'."
+            continue
+
+        for fetched_case in fetched_cases:
+            fetched_case["allure_uid"] = case_uid(fetched_case["test_name"], market_code, fetched_case["model_code"])
+            if fetched_case["urls"].get("HOME_PAGE"):
+                fetched_case["urls"]["HOME_PAGE"] += LIVE_TEST_QUERY
+
+        if model_code:
+            # Update the manual case with the fetched URLs for the specific model
+            case["urls"] = fetched_cases[0].get("urls", {})
+            case["model_name"] = fetched_cases[0].get("model_name", None)
+            case["body_type"] = fetched_cases[0].get("body_type", None)
+            if fetched_cases[0].get("fetch_error"):
+                case["fetch_error"] = fetched_cases[0]["fetch_error"]
+        else:
+            # Market-wide entries expand into one test case per model
+            dynamic_test_cases.extend(fetched_cases)
+
+    vehicle_api.client.log_summary()
+    return manual_test_cases + dynamic_test_cases
+
+
+def get_session_plan(config, entries):
+    """
+    Returns the resolved test cases for this pytest session, building them at most once.
+
+    On xdist workers the plan is read from `workerinput`, where the controller put it
+    (see `pytest_configure_node` in conftest.py), so workers never call the deeplinks API.
+    Anywhere else the plan is built on first use (or read from `--load-plan`) and kept
+    in the config stash. `--test-dictionaries` replaces `entries` with the stored market matrix.
+    `--save-plan` writes the resolved plan to a snapshot file.
+    """
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None and "test_plan" in workerinput:
+        return workerinput["test_plan"]
+
+    if SESSION_PLAN_KEY not in config.stash:
+        load_path = config.getoption("load_plan", default=None)
+        if load_path:
+            plan = load_test_plan(load_path)
+        else:
+            dictionaries = config.getoption("test_dictionaries", default=None)
+            if dictionaries:
+                entries = load_test_dictionaries(dictionaries)
+            vehicle_api = VehicleAPI(
+                "YOUR_ACCESS_TOKEN",  # Replace with your actual access token
+                cache=DeeplinkCache.from_env(),
+                bulk=config.getoption("bulk_deeplinks", default=False),
+            )
+            plan = build_test_plan(entries, vehicle_api)
+
+        save_path = config.getoption("save_plan", default=None)
+        if save_path:
+            save_test_plan(plan, save_path)
+        config.stash[SESSION_PLAN_KEY] = plan
+    return config.stash[SESSION_PLAN_KEY]
+
+
+def load_test_dictionaries(directory):
+    """Loads and concatenates every test entry list stored as JSON in `directory`, e.g. tests_dictionaries/."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "r", encoding="utf-8") as file:
+            entries.extend(json.load(file))
+    if not entries:
+        raise ValueError(f"❌ No test entries found in: {directory}")
+    logging.info(f"📂 Loaded {len(entries)} test entries from: {directory}")
+    return entries
+
+
+def save_test_plan(cases, path):
+    """Writes resolved test cases to a compact JSON snapshot (gzip-compressed when the path ends in .gz)."""
+    snapshot = {"version": PLAN_SNAPSHOT_VERSION, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": cases}
+    payload = json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wb") as file:
+        file.write(payload)
+    logging.info(f"💾 Saved test plan with {len(cases)} cases to: {path}")
+
+
+def load_test_plan(path):
+    """Reads test cases written by save_test_plan, without calling the deeplinks API."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as file:
+        snapshot = json.loads(file.read().decode("utf-8"))
+    if snapshot.get("version") != PLAN_SNAPSHOT_VERSION:
+        raise ValueError(f"❌ Unsupported test plan snapshot version {snapshot.get('version')} in: {path}")
+
+    cases = snapshot["cases"]
+    for case in cases:
+        case.setdefault("allure_uid", case_uid(case["test_name"], case["market_code"], case.get("model_code")))
+    logging.info(f"📂 Loaded test plan with {len(cases)} cases from: {path} (created {snapshot.get('created_at')})")
+    return cases
@@ -2,10 +2,41 @@
 
 import allure
 import logging
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import WebDriverException
+from App.StepTimings import AdaptiveWait
+from App.Waits import mark_document, network_idle, page_ready, wait_until
+
+DEFAULT_NAVIGATION_TIMEOUT = 20
+
+
+def navigate(driver, url, page_type="page", timeout=DEFAULT_NAVIGATION_TIMEOUT, step=None):
+    """
+    Opens `url` and returns as soon as the part of the page that matters is ready.
+
+    With the `eager` or `none` page load strategy (--page-load-strategy), driver.get no longer
+    waits for the load event, so the readiness probe of the page type decides when to continue.
+
+    Args:
+        driver: WebDriver instance.
+        url (str): Page to open.
+        page_type (str): One of Waits.PAGE_TYPES, selects the readiness probe.
+        timeout (float): Fixed timeout, learned per market by AdaptiveWait.
+        step (str): Name the navigation time is recorded under. Defaults to `page_type`.
+
+    Raises:
+        TimeoutException: If the page is not ready within the timeout.
+    """
+    try:
+        mark_document(driver)
+    except Exception:
+        pass  # Nothing to mark on a fresh tab or a crashed page
+    driver.get(url)
+    # The probe scripts can fail while the previous document is being torn down, which only means not ready yet
+    AdaptiveWait(driver, step or page_type, timeout, ignored_exceptions=(WebDriverException,)).until(page_ready(page_type))
+
 
 @allure.step("Navigate to HOME_PAGE: {url}")
 def navigate_to_home_page(driver, url):
-    driver.get(url)
-    WebDriverWait(driver, 15).until(lambda driver: driver.execute_script("return document.readyState") == "complete")
+    navigate(driver, url, "home", 15)
+    wait_until(driver, network_idle(), 15)
     logging.info(f"🌍 Navigated to: {url}")
\ No newline at end of file
@@ -1,15 +1,16 @@
 import json
 import logging
-import time
 import os
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import allure
 from App.ScreenshotHandler import ScreenshotHandler
 from App.CTAVerifierPDP import CTAVerifier
 import pytest
 from App.ImageVerifier import ImageVerifier
+from App.PersonalizationProbe import PersonalizationProbe, NOT_DECIDED, WRONG
+from App.Waits import scroll_settled, wait_until
+from App.StepTimings import AdaptiveWait
 
 # Función para adjuntar capturas de pantalla a Allure
 def attach_screenshot_to_allure(screenshot_path):
@@ -37,6 +38,12 @@ def verify_personalization_and_capture(
     Verifies the personalized image and captures XHR responses and screenshots.
     """
     try:
+        # Determine the expected src based on the test_name
+        if test_name in ["BFV1", "BFV2", "BFV3"]:
+            expected_src = "/content/dam/hq/personalization/campaignmodule/"
+        else:
+            expected_src = "/images/dynamic/europe/"
+
         # Check userGroup before verifying the personalized image
         with allure.step("🔍 Checking userGroup in XHR responses..."):
             try:
@@ -45,8 +52,14 @@ def verify_personalization_and_capture(
                     xhr_capturer.set_campaign_name_substring(test_name)
                     logging.info("✅ Campaign name substring set successfully.")
                     
-                    # Capture XHR responses
-                    xhr_capturer.capture_responses()
+                    # Continue as soon as Evergage has decided and the campaign module shows the decision
+                    with allure.step("⏳ Waiting for the personalization decision"):
+                        probe_result = PersonalizationProbe(driver, xhr_capturer, expected_src).wait()
+                        allure.attach(json.dumps(probe_result, indent=2), name="Personalization Probe", attachment_type=allure.attachment_type.JSON)
+                    if probe_result["state"] == NOT_DECIDED:
+                        allure.dynamic.label("defect", "Not Personalized Yet")
+                    elif probe_result["state"] == WRONG:
+                        allure.dynamic.label("defect", "Wrong Personalization")
                     xhr_data = xhr_capturer.get_captured_data()
                     logging.info(f"ℹ️ Captured XHR data: {xhr_data}")
                     
@@ -86,19 +99,13 @@ def verify_personalization_and_capture(
         # Verify the personalized image
         with allure.step("🔍 Verifying personalized image..."):
             try:
-                # Determine the expected src based on the test_name
-                if test_name in ["BFV1", "BFV2", "BFV3"]:
-                    expected_src = "/content/dam/hq/personalization/campaignmodule/"
-                else:
-                    expected_src = "/images/dynamic/europe/"
-
                 # Dynamically determine the selector based on the market
                 selector = "[data-component-name='hp-campaigns']"
                 
                 # Wait for at least one image inside the selector to be present and loaded
                 with allure.step("⏳ Waiting for images inside the campaign section to load..."):
                     try:
-                        WebDriverWait(driver, 10).until(
+                        AdaptiveWait(driver, "campaign_images", 10).until(
                             lambda d: d.execute_script("""
                                 const imgs = document.querySelectorAll(arguments[0] + ' img');
                                 return Array.from(imgs).length > 0 && Array.from(imgs).every(img => img.complete && img.naturalHeight !== 0);
@@ -122,7 +129,7 @@ def verify_personalization_and_capture(
                         return False
 
                 # Capture screenshot
-                time.sleep(1)  # Wait for the scroll to complete
+                wait_until(driver, scroll_settled(), 1)  # Wait for the scroll to complete
                 logging.info("📸 Taking screenshot...")
                 screenshot_handler = ScreenshotHandler(driver, screenshot_dir)
                 screenshot_path = os.path.join(screenshot_dir, f"{test_name}_attempt_{retries + 1}.png")
@@ -170,7 +177,7 @@ def verify_personalization_and_capture(
             except Exception as e:
                 # Capture screenshot
                 logging.info("📸 Taking screenshot...")
-                time.sleep(1)  # Wait for the scroll to complete
+                wait_until(driver, scroll_settled(), 1)  # Wait for the scroll to complete
                 screenshot_handler = ScreenshotHandler(driver, screenshot_dir)
                 screenshot_path = os.path.join(screenshot_dir, f"{test_name}_attempt_{retries + 1}.png")
 
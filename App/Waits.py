@@ -0,0 +1,271 @@
+import logging
+import os
+import time
+
+from App.CDPEventListener import NetworkActivityTracker
+from App.ResourcePolicy import THIRD_PARTY_PATTERNS
+
+EVERGAGE_HOST = "daimleragemea.germany-2.evergage.com"
+DEFAULT_POLL_INTERVAL = 0.1
+DEFAULT_IDLE_MS = 500
+DOCUMENT_MARKER = "__qaPreviousDocument"  # Set on a document before leaving it, absent from the next one
+PDP_STAGE_SELECTOR = "#emh-pdp .product-stage"
+SRP_TILE_SELECTOR = "img.wbx-vehicle-tile__image-img"
+CONFIGURATOR_HOST_SELECTOR = "owcc-car-configurator"
+PAGE_TYPES = ("page", "product", "home", "pdp", "configurator", "srp")
+# Analytics and tag managers keep sending requests long after the page is usable
+NETWORK_IDLE_IGNORED_PATTERNS = THIRD_PARTY_PATTERNS + [
+    "*googletagmanager.com*",
+    "*demdex.net*",
+    "*omtrdc.net*",
+    "*adobedc.net*",
+]
+
+
+def _condition(check, description):
+    """Tags a `check(driver) -> bool` callable with a description used in the logs."""
+    check.description = description
+    return check
+
+
+def script_true(script, *args, description="script condition"):
+    """True once `script` (which must `return` a value) returns a truthy value."""
+    return _condition(lambda driver: bool(driver.execute_script(script, *args)), description)
+
+
+def dom_ready():
+    """True once document.readyState is 'complete'."""
+    return script_true("return document.readyState === 'complete';", description="DOM ready")
+
+
+def dom_interactive():
+    """True once the DOM is parsed (DOMContentLoaded), without waiting for images, fonts and iframes."""
+    return script_true("return document.readyState !== 'loading';", description="DOM interactive")
+
+
+def mark_document(driver):
+    """Marks the current document, so document_replaced() can tell it apart from the next one."""
+    driver.execute_script(f"window.{DOCUMENT_MARKER} = true;")
+
+
+def document_replaced():
+    """True once the document marked by mark_document() has been replaced by a new one."""
+    return script_true(f"return !window.{DOCUMENT_MARKER};", description="new document")
+
+
+def element_present(css_selector):
+    """True once an element matching `css_selector` is in the DOM."""
+    return script_true("return document.querySelector(arguments[0]) !== null;", css_selector,
+                       description=f"{css_selector} present")
+
+
+def shadow_element_present(host_selector, inner_selector):
+    """True once `inner_selector` matches inside the shadow root of the first `host_selector` element."""
+    return script_true(
+        """
+        const host = document.querySelector(arguments[0]);
+        return !!(host && host.shadowRoot && host.shadowRoot.querySelector(arguments[1]));
+        """,
+        host_selector, inner_selector, description=f"{host_selector} >>> {inner_selector} present",
+    )
+
+
+def url_changed(previous_url):
+    """True once the browser has left `previous_url`, e.g. after a click that navigates."""
+    return _condition(lambda driver: driver.current_url != previous_url, "URL changed")
+
+
+def element_stable(css_selector):
+    """True once the element's bounding box is the same on two consecutive polls (scrolls and animations done)."""
+    last_rect = []
+
+    def check(driver):
+        rect = driver.execute_script("""
+            const element = document.querySelector(arguments[0]);
+            if (!element) return null;
+            const r = element.getBoundingClientRect();
+            return [r.top, r.left, r.width, r.height];
+        """, css_selector)
+        stable = rect is not None and last_rect == [rect]
+        last_rect[:] = [rect]
+        return stable
+
+    return _condition(check, f"{css_selector} stable")
+
+
+def scroll_settled():
+    """True once the scroll position is the same on two consecutive polls."""
+    last_position = []
+
+    def check(driver):
+        position = driver.execute_script("return [window.scrollX, window.scrollY];")
+        settled = last_position == [position]
+        last_position[:] = [position]
+        return settled
+
+    return _condition(check, "scroll settled")
+
+
+def network_quiet(quiet_ms=DEFAULT_IDLE_MS):
+    """True once the page is loaded and no resource has finished loading for `quiet_ms` milliseconds."""
+    return script_true(
+        """
+        if (document.readyState !== 'complete') return false;
+        const entries = performance.getEntriesByType('resource');
+        const lastEnd = entries.reduce((latest, entry) => Math.max(latest, entry.responseEnd), 0);
+        return performance.now() - lastEnd >= arguments[0];
+        """,
+        quiet_ms, description=f"network quiet for {quiet_ms} ms",
+    )
+
+
+def network_idle(idle_ms=DEFAULT_IDLE_MS, ignore_patterns=()):
+    """
+    True once no request is in flight and none started or ended for `idle_ms` milliseconds.
+
+    Uses the driver's network tracker (see start_network_tracking). Without one, falls back to
+    network_quiet(), which only sees finished requests through the resource timing API.
+    """
+    quiet = network_quiet(idle_ms)
+
+    def check(driver):
+        tracker = getattr(driver, "network_tracker", None)
+        if tracker is None or tracker.error:
+            return quiet(driver)
+        return tracker.is_idle(idle_ms, ignore_patterns)
+
+    return _condition(check, f"network idle for {idle_ms} ms")
+
+
+def evergage_beacon_count(driver):
+    """Returns how many Evergage API calls the current document has completed."""
+    return driver.execute_script("""
+        if (performance.setResourceTimingBufferSize) performance.setResourceTimingBufferSize(2000);
+        return performance.getEntriesByType('resource').filter(entry => entry.name.includes(arguments[0])).length;
+    """, EVERGAGE_HOST)
+
+
+def evergage_beacon_sent(min_count=1):
+    """
+    True once the current document has completed at least `min_count` Evergage API calls.
+
+    To wait for the beacon of an action, pass `evergage_beacon_count(driver) + 1` taken before it.
+    """
+    return _condition(lambda driver: evergage_beacon_count(driver) >= min_count, "Evergage beacon sent")
+
+
+def all_of(*conditions):
+    """True once every condition is true, evaluated in order."""
+    return _condition(lambda driver: all(condition(driver) for condition in conditions),
+                      " and ".join(condition.description for condition in conditions))
+
+
+def any_of(*conditions):
+    """True once any condition is true."""
+    return _condition(lambda driver: any(condition(driver) for condition in conditions),
+                      " or ".join(condition.description for condition in conditions))
+
+
+def page_tracked():
+    """A journey page is done once it is loaded, Evergage has registered the visit and the network is idle."""
+    return all_of(dom_interactive(), evergage_beacon_sent(), network_idle())
+
+
+def configurator_ready():
+    """The configurator page is ready once it is tracked and its navigation has rendered inside the shadow DOM."""
+    return all_of(page_tracked(), shadow_element_present(CONFIGURATOR_HOST_SELECTOR, "cc-navigation"))
+
+
+def page_ready(page_type="page"):
+    """
+    Readiness probe for a page type: only the part of the page the tests use, not the load event.
+
+    Args:
+        page_type (str): One of PAGE_TYPES. "page", "product" and "home" only need the parsed DOM;
+            a missing campaign module is reported by PersonalizationProbe instead of failing the navigation.
+
+    Returns:
+        A condition that also requires the previous document (see mark_document) to be gone.
+    """
+    probes = {
+        "page": [],
+        "product": [],
+        "home": [],
+        "pdp": [element_present(PDP_STAGE_SELECTOR)],
+        "configurator": [shadow_element_present(CONFIGURATOR_HOST_SELECTOR, "cc-navigation")],
+        "srp": [element_present(SRP_TILE_SELECTOR)],
+    }
+    return all_of(document_replaced(), dom_interactive(), *probes[page_type])
+
+
+def wait_until(driver, condition, max_seconds, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Waits until `condition` is true, for at most `max_seconds`.
+
+    The wait is soft: `max_seconds` matches the fixed sleep it replaces, so running out of time
+    just continues the test as the sleep did. Errors raised by the condition count as not met.
+
+    Returns:
+        bool: True if the condition was met, False if `max_seconds` elapsed.
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            if condition(driver):
+                logging.info(f"⏱️ {condition.description} after {time.monotonic() - start:.1f}s (max {max_seconds}s).")
+                return True
+        except Exception:
+            pass
+        if time.monotonic() - start >= max_seconds:
+            logging.warning(f"⚠️ {condition.description} not met within {max_seconds}s, continuing.")
+            return False
+        time.sleep(poll_interval)
+
+
+def wait_for_network_idle(driver, idle_ms=DEFAULT_IDLE_MS, timeout=10, ignore_patterns=()):
+    """
+    Waits until the page has had no request in flight for `idle_ms` milliseconds.
+
+    Args:
+        driver: WebDriver instance.
+        idle_ms (int): Quiet period required.
+        timeout (float): Maximum seconds to wait; the wait is soft like wait_until().
+        ignore_patterns (list): Extra URL patterns (fnmatch) never counted, e.g. long-polling endpoints.
+
+    Returns:
+        bool: True if the network went idle within `timeout`.
+    """
+    return wait_until(driver, network_idle(idle_ms, ignore_patterns), timeout)
+
+
+def start_network_tracking(driver):
+    """
+    Starts counting the driver's in-flight requests, used by network_idle().
+
+    Disabled when NETWORK_IDLE_TRACKING is "0" (`--no-network-tracking`). Patterns from
+    NETWORK_IDLE_IGNORE (comma separated, `--network-idle-ignore`) are ignored on top of the
+    analytics hosts. If the CDP session cannot be opened, the waits fall back to resource timing.
+
+    Returns:
+        NetworkActivityTracker: The running tracker, or None.
+    """
+    if os.environ.get("NETWORK_IDLE_TRACKING", "1") == "0":
+        return None
+    extra_patterns = [pattern.strip() for pattern in os.environ.get("NETWORK_IDLE_IGNORE", "").split(",") if pattern.strip()]
+    tracker = NetworkActivityTracker(driver, NETWORK_IDLE_IGNORED_PATTERNS + extra_patterns)
+    try:
+        tracker.start()
+    except Exception as e:
+        logging.warning(f"⚠️ Network tracking unavailable, network idle falls back to resource timing: {e}")
+        tracker.stop()
+        return None
+    driver.network_tracker = tracker
+    return tracker
+
+
+def stop_network_tracking(driver):
+    """Stops the tracker started by start_network_tracking(), if any."""
+    tracker = getattr(driver, "network_tracker", None)
+    if tracker is not None:
+        tracker.stop()
+        driver.network_tracker = None
@@ -1,24 +1,132 @@
 import json
 import logging
+import os
+import time
+from urllib.parse import urlsplit
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium_stealth import stealth
 import allure
+from App.CDPEventListener import CDPEventListener, FetchInterceptor
+from App.InPageRecorder import InPageRecorder
+from App.PerformanceLogDrainer import DEFAULT_BUFFER_SIZE, DEFAULT_DRAIN_INTERVAL, PerformanceLogDrainer
 
+CAPTURE_MODES = ("log", "stream", "inpage", "fetch")
+DEFAULT_MAX_POST_DATA_SIZE = 64 * 1024  # Request bodies are never read; Evergage event payloads are a few KB
+MAX_CAPTURED_RESPONSES = 200  # Filtered campaign responses kept across capture_responses() calls
+DEFAULT_CAMPAIGN_TIMEOUT = 10  # Seconds wait_for_campaign() waits for Evergage to decide
+CAMPAIGN_POLL_INTERVAL = 0.25
+
+
+class CampaignTimeoutError(TimeoutError):
+    """Raised when no matching campaign response arrives before the timeout."""
 
 
 class XHRResponseCapturer:
-    """Captures XHR responses, filtering by Daimler's API."""
+    """
+    Captures XHR responses, filtering by Daimler's API.
+
+    Capture modes:
+        log: reads the performance log when capture_responses() is called (default).
+        stream: a CDPEventListener records target responses as they arrive.
+        inpage: an InPageRecorder script records them inside the page; one execute_script reads them all.
+        fetch: a FetchInterceptor pauses only the target responses, optionally serving local stubs.
+    """
     
-    def __init__(self, driver, target_url_filter, target_campaign_name_substring=""):
+    def __init__(self, driver, target_url_filter, target_campaign_name_substring="", capture_mode=None):
         self.driver = driver
         self.TARGET_URL_FILTER = target_url_filter
         self.TARGET_CAMPAIGN_NAME_SUBSTRING = target_campaign_name_substring
+        self.capture_mode = capture_mode or os.environ.get("XHR_CAPTURE_MODE", "log")
+        if self.capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"❌ Unknown capture mode '{self.capture_mode}'. Expected one of: {', '.join(CAPTURE_MODES)}")
+        self.listener = None
+        self.recorder = None
+        self.drainer = None
         self.setup_stealth()
         self.enable_network_logging()
         self.captured_data = []
+        self._pending_bodies = {}  # requestId -> (url, status) of log-mode responses whose body is not available yet
+        if self.capture_mode in ("stream", "fetch"):
+            self.start_listener()
+        elif self.capture_mode == "inpage":
+            self.start_recorder()
+        self.start_drainer()
+
+    @staticmethod
+    def load_stubs():
+        """Reads the {url substring: response body} stubs from the XHR_FETCH_STUBS JSON file, if set."""
+        path = os.environ.get("XHR_FETCH_STUBS")
+        if not path:
+            return None
+        with open(path, 'r', encoding='utf-8') as file:
+            stubs = json.load(file)
+        logging.info(f"📂 Serving {len(stubs)} stubbed Evergage responses from: {path}")
+        return stubs
+
+    def start_recorder(self):
+        """Registers the in-page recorder before the first navigation of the test."""
+        with allure.step("Injecting in-page response recorder"):
+            self.recorder = InPageRecorder(self.driver, self.TARGET_URL_FILTER)
+            self.recorder.start()
+
+    def start_drainer(self):
+        """
+        Drains the performance log in the background (XHR_LOG_DRAIN_INTERVAL seconds, 0 disables it).
+
+        In log mode only the target responses are buffered. In the other modes the responses
+        are captured elsewhere, so every entry is discarded to keep ChromeDriver's log small.
+        """
+        interval = float(os.environ.get("XHR_LOG_DRAIN_INTERVAL", DEFAULT_DRAIN_INTERVAL))
+        if interval <= 0:
+            return
+        keep = self._is_target_entry if self.capture_mode == "log" else (lambda message: False)
+        self.drainer = PerformanceLogDrainer(
+            self.driver, keep, interval=interval,
+            buffer_size=int(os.environ.get("XHR_LOG_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)),
+        )
+        self.drainer.start()
+
+    def _is_target_entry(self, message):
+        # Cheap substring check, so only the Evergage responses are JSON-decoded
+        target_host = urlsplit(self.TARGET_URL_FILTER).netloc or self.TARGET_URL_FILTER
+        return '"Network.responseReceived"' in message and target_host in message
+
+    def start_listener(self):
+        """Starts recording the target responses over a CDP websocket session."""
+        with allure.step(f"Starting CDP {self.capture_mode} listener"):
+            if self.capture_mode == "fetch":
+                self.listener = FetchInterceptor(self.driver, self.TARGET_URL_FILTER, stubs=self.load_stubs())
+            else:
+                self.listener = CDPEventListener(self.driver, self.TARGET_URL_FILTER)
+            try:
+                self.listener.start()
+            except Exception as e:
+                logging.warning(f"⚠️ Streaming capture unavailable, falling back to the performance log: {e}")
+                self.listener.stop()
+                self.listener = None
+                self.capture_mode = "log"
+
+    def close(self):
+        """Stops the background listener and log drainer, if any. The driver itself is left untouched."""
+        if self._pending_bodies:
+            logging.warning(f"⚠️ {len(self._pending_bodies)} Evergage response bodies were never available: {[url for url, _ in self._pending_bodies.values()]}")
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.drainer is not None:
+            self.drainer.stop()
+            self.drainer = None
+        if self.recorder is not None:
+            try:
+                self.recorder.stop()
+            except Exception as e:
+                logging.warning(f"⚠️ Failed to remove the in-page recorder: {e}")
+            self.recorder = None
 
     def setup_stealth(self):
         """Applies stealth settings to evade detection in headless mode."""
+        if getattr(self.driver, "stealth_applied", False):
+            return  # Pooled browsers keep the scripts registered by a previous test
         with allure.step("Setting up stealth mode for the browser"):
             stealth(self.driver,
                     user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -28,11 +136,27 @@ class XHRResponseCapturer:
                     webgl_vendor="Intel Inc.",
                     renderer="Intel Iris OpenGL Engine",
                     fix_hairline=True)
+            self.driver.stealth_applied = True
 
     def enable_network_logging(self):
-        """Enables network tracking to capture response bodies."""
+        """
+        Enables network tracking to capture response bodies.
+
+        Chrome's buffer limits come from the CDP_* variables exported by conftest.py; the
+        resource and total buffers keep Chrome's defaults unless they are set.
+        """
+        params = {
+            "enableCors": True,
+            "maxPostDataSize": int(os.environ.get("CDP_MAX_POST_DATA_SIZE", DEFAULT_MAX_POST_DATA_SIZE)),
+        }
+        if os.environ.get("CDP_MAX_RESOURCE_BUFFER_SIZE"):
+            params["maxResourceBufferSize"] = int(os.environ["CDP_MAX_RESOURCE_BUFFER_SIZE"])
+        if os.environ.get("CDP_MAX_TOTAL_BUFFER_SIZE"):
+            params["maxTotalBufferSize"] = int(os.environ["CDP_MAX_TOTAL_BUFFER_SIZE"])
+        if self.capture_mode == "fetch":
+            return  # Only the intercepted Evergage requests are observed
         with allure.step("Enabling network logging"):
-            self.driver.execute_cdp_cmd("Network.enable", {"enableCors": True, "maxPostDataSize": 5000000})
+            self.driver.execute_cdp_cmd("Network.enable", params)
         
     def set_campaign_name_substring(self, test_name):
         """Dynamically sets the campaign name substring based on the test name."""
@@ -74,56 +198,127 @@ class XHRResponseCapturer:
     def capture_responses(self):
         """Captures and filters XHR responses with status 200 and matching campaign names."""
         with allure.step("Capturing XHR responses"):
-            browser_log = self.driver.get_log('performance')
-            events = [self.process_browser_log_entry(entry) for entry in browser_log]
-            events = [event for event in events if event and event.get('method') == 'Network.responseReceived']
-
-            for event in events:
-                request_id = event["params"]["requestId"]
-                response = event["params"]["response"]
-                response_url = response["url"]
-                status = response["status"]
-
-                # Skip 204 responses entirely
-                if status == 204:
-                    continue  # Ignore and move to the next response
-
-                # Only continue if it's the desired endpoint and a successful (200) response
-                if self.TARGET_URL_FILTER in response_url and status == 200:
-                    try:
-                        response_body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
-                        response_text = response_body.get("body", "")
-
-                        try:
-                            json_response = json.loads(response_text)
-                            if "campaignResponses" in json_response:
-                                # Filter campaign responses based on the TARGET_CAMPAIGN_NAME_SUBSTRING
-                                filtered_campaigns = [
-                                    campaign for campaign in json_response["campaignResponses"]
-                                    if self.TARGET_CAMPAIGN_NAME_SUBSTRING.lower() in campaign.get("campaignName", "").lower()
-                                ]
-
-                                # If there are matching campaigns, save the filtered response
-                                if filtered_campaigns:
-                                    filtered_response = {
-                                        "url": response_url,
-                                        "status": status,
-                                        "body": {"campaignResponses": filtered_campaigns}
-                                    }
-                                    self.captured_data.append(filtered_response)
-
-                                    # Attach filtered response to Allure for debugging
-                                    formatted_response = json.dumps(filtered_response, indent=4, ensure_ascii=False)
-                                    allure.attach(formatted_response, name=f"Filtered Campaign Response from {response_url}", attachment_type=allure.attachment_type.JSON)
-
-                        except json.JSONDecodeError:
-                            allure.attach(response_text, name=f"Raw Response Body from {response_url}", attachment_type=allure.attachment_type.TEXT)
-
-                    except Exception as e:
-                        logging.error(f"Error capturing response for {response_url}: {e}")
-                elif self.TARGET_URL_FILTER in response_url:
-                    allure.attach(f"Ignored response with status {status}: {response_url}", name="Info", attachment_type=allure.attachment_type.TEXT)
-                
+            for response in self._collect():
+                self._record_response(response["url"], response["status"], response["body"])
+
+    def wait_for_campaign(self, substring=None, timeout=DEFAULT_CAMPAIGN_TIMEOUT):
+        """
+        Waits until a campaign response matching `substring` has been captured.
+
+        Args:
+            substring (str): Campaign name substring. Defaults to TARGET_CAMPAIGN_NAME_SUBSTRING.
+            timeout (float): Seconds to wait for the campaign.
+
+        Returns:
+            dict: The first matching campaign of the captured `campaignResponses`.
+
+        Raises:
+            CampaignTimeoutError: If no matching campaign arrives within `timeout`.
+        """
+        substring = self.TARGET_CAMPAIGN_NAME_SUBSTRING if substring is None else substring
+        start = time.monotonic()
+        with allure.step(f"⏳ Waiting for campaign '{substring}' (max {timeout}s)"):
+            while True:
+                campaign = self.poll_campaign(substring)
+                elapsed = time.monotonic() - start
+                if campaign is not None:
+                    logging.info(f"✅ Campaign '{campaign.get('campaignName')}' received after {elapsed:.1f}s.")
+                    return campaign
+                if elapsed >= timeout:
+                    raise CampaignTimeoutError(f"❌ No campaign matching '{substring}' received within {timeout}s.")
+                time.sleep(CAMPAIGN_POLL_INTERVAL)
+
+    def poll_campaign(self, substring=None):
+        """Records the responses that arrived since the last call and returns the first matching campaign, or None."""
+        substring = self.TARGET_CAMPAIGN_NAME_SUBSTRING if substring is None else substring
+        for response in self._collect():
+            self._record_response(response["url"], response["status"], response["body"], substring)
+        return self._find_campaign(substring)
+
+    def _find_campaign(self, substring):
+        for response in self.captured_data:
+            for campaign in response["body"]["campaignResponses"]:
+                if substring.lower() in campaign.get("campaignName", "").lower():
+                    return campaign
+        return None
+
+    def _collect(self):
+        """Returns the target responses seen so far as dicts with `url`, `status` and `body` (None when not fetched)."""
+        if self.capture_mode in ("stream", "fetch"):
+            return self.listener.drain()
+        if self.capture_mode == "inpage":
+            return self.recorder.drain()
+
+        responses = []
+        if self.drainer is not None:
+            browser_log = self.drainer.read_new()  # Only the entries this capturer has not seen yet
+        else:
+            browser_log = [entry for entry in self.driver.get_log('performance') if self._is_target_entry(entry['message'])]
+        events = [self.process_browser_log_entry(entry) for entry in browser_log]
+        events = [event for event in events if event and event.get('method') == 'Network.responseReceived']
+        # Redirects repeat the requestId; the last response is the one with the body
+        events = list({event["params"]["requestId"]: event for event in events}.values())
+
+        for event in events:
+            response = event["params"]["response"]
+            if self.TARGET_URL_FILTER not in response["url"]:
+                continue
+            if response["status"] == 200:
+                self._pending_bodies[event["params"]["requestId"]] = (response["url"], response["status"])
+            else:
+                responses.append({"url": response["url"], "status": response["status"], "body": None})
+
+        # The drainer cursor never returns an entry twice, so a body that is not available yet
+        # (the response is still loading) stays pending and is requested again on the next call
+        for request_id, (response_url, status) in list(self._pending_bodies.items()):
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id}).get("body", "")
+            except Exception as e:
+                logging.debug(f"Response body of {response_url} not available yet: {e}")
+                continue
+            del self._pending_bodies[request_id]
+            responses.append({"url": response_url, "status": status, "body": body})
+        return responses
+
+    def _record_response(self, response_url, status, response_text, substring=None):
+        """Keeps the campaign responses matching `substring` (default TARGET_CAMPAIGN_NAME_SUBSTRING) and attaches them to Allure."""
+        substring = self.TARGET_CAMPAIGN_NAME_SUBSTRING if substring is None else substring
+        # Skip 204 responses entirely
+        if status == 204:
+            return
+
+        if status != 200:
+            allure.attach(f"Ignored response with status {status}: {response_url}", name="Info", attachment_type=allure.attachment_type.TEXT)
+            return
+        if response_text is None:
+            return  # The body could not be fetched; the error has been logged
+
+        try:
+            json_response = json.loads(response_text)
+            if "campaignResponses" in json_response:
+                # Filter campaign responses based on the campaign name substring
+                filtered_campaigns = [
+                    campaign for campaign in json_response["campaignResponses"]
+                    if substring.lower() in campaign.get("campaignName", "").lower()
+                ]
+
+                # If there are matching campaigns, save the filtered response
+                if filtered_campaigns:
+                    filtered_response = {
+                        "url": response_url,
+                        "status": status,
+                        "body": {"campaignResponses": filtered_campaigns}
+                    }
+                    self.captured_data.append(filtered_response)
+                    del self.captured_data[:-MAX_CAPTURED_RESPONSES]
+
+                    # Attach filtered response to Allure for debugging
+                    formatted_response = json.dumps(filtered_response, indent=4, ensure_ascii=False)
+                    allure.attach(formatted_response, name=f"Filtered Campaign Response from {response_url}", attachment_type=allure.attachment_type.JSON)
+
+        except json.JSONDecodeError:
+            allure.attach(response_text, name=f"Raw Response Body from {response_url}", attachment_type=allure.attachment_type.TEXT)
+
     def get_captured_data(self):
         """Returns the captured XHR responses."""
         return self.captured_data
@@ -1,15 +1,20 @@
 import requests
 import logging
+from App.HttpClient import get_shared_client
 
 class ModelCodesAPI:
-    def __init__(self, access_token):
+    def __init__(self, access_token, cache=None, client=None):
         """
         Initializes the ModelCodesAPI class with an access token for making API requests.
         
         Args:
             access_token (str): The access token for the API.
+            cache (DeeplinkCache, optional): Persistent cache for the model-series listing.
+            client (HttpClient, optional): HTTP client to use. Defaults to the process-wide shared client.
         """
         self.access_token = access_token
+        self.cache = cache
+        self.client = client or get_shared_client()
         self.headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
@@ -25,43 +30,66 @@ class ModelCodesAPI:
         Returns:
             list: A list of passenger car model codes, or an empty list if an error occurs.
         """
+        data = self.fetch_model_series(market_code)
+        if data is None:
+            return []
+        return self.passenger_car_model_codes(data)
+
+    def fetch_model_series(self, market_code):
+        """
+        Fetches the full model-series listing of a market, including the `modelSeriesUrl` entries.
+
+        Args:
+            market_code (str): The market code to fetch the listing for.
+
+        Returns:
+            dict: The listing keyed by model code, or None if an error occurs.
+        """
         url = f"https://api.oneweb.mercedes-benz.com/vehicle-deeplinks-api/v1/deeplinks/{market_code}/model-series"
         try:
-            # Realiza la solicitud GET
-            response = requests.get(url, headers=self.headers)
+            # Realiza la solicitud GET (desde la caché si está disponible)
+            try:
+                status_code, data = self.client.get_json(url, self.headers, cache=self.cache, market_code=market_code)
+            except ValueError:
+                logging.error("Error al parsear la respuesta JSON.")
+                return None
 
             # Verifica si la solicitud fue exitosa
-            if response.status_code == 200:
-                # Parsear la respuesta JSON
-                try:
-                    data = response.json()
-                    if not isinstance(data, dict):
-                        logging.error("La respuesta de la API no tiene el formato esperado.")
-                        return []
-
-                    # Filtrar los modelos disponibles
-                    passenger_car_model_codes = []
-                    for model_key, model_data in data.items():
-                        # Verificar si cualquier URL en el modelo contiene "/vans/", "/amg/" o "/maybach/"
-                        contains_excluded_keywords = any(
-                            keyword in value.get("modelSeriesUrl", "")
-                            for key, value in model_data.items()
-                            if isinstance(value, dict)
-                            for keyword in ["/vans/", "/amg-gt-2-door/", "/amg-gt-4-door/", "/mercedes-maybach-s-class/", "/mercedes-maybach-sl/", "/maybach-eqs/", "/maybach/"]
-                        )
-                        # Si contiene alguna de las palabras clave excluidas, excluir el modelo
-                        if not contains_excluded_keywords:
-                            passenger_car_model_codes.append(model_key)
-                    return passenger_car_model_codes
-                except ValueError:
-                    logging.error("Error al parsear la respuesta JSON.")
-                    return []
-            else:
-                logging.error("Error al recuperar los datos. Código de estado: %s", response.status_code)
-                return []
+            if status_code != 200:
+                logging.error("Error al recuperar los datos. Código de estado: %s", status_code)
+                return None
+            if not isinstance(data, dict):
+                logging.error("La respuesta de la API no tiene el formato esperado.")
+                return None
+            return data
         except requests.exceptions.RequestException as e:
             logging.error("Ocurrió un error al realizar la solicitud: %s", e)
-            return []
+            return None
+
+    def passenger_car_model_codes(self, data):
+        """
+        Filters a model-series listing down to passenger car model codes.
+
+        Args:
+            data (dict): The listing returned by fetch_model_series.
+
+        Returns:
+            list: The passenger car model codes.
+        """
+        # Filtrar los modelos disponibles
+        passenger_car_model_codes = []
+        for model_key, model_data in data.items():
+            # Verificar si cualquier URL en el modelo contiene "/vans/", "/amg/" o "/maybach/"
+            contains_excluded_keywords = any(
+                keyword in value.get("modelSeriesUrl", "")
+                for key, value in model_data.items()
+                if isinstance(value, dict)
+                for keyword in ["/vans/", "/amg-gt-2-door/", "/amg-gt-4-door/", "/mercedes-maybach-s-class/", "/mercedes-maybach-sl/", "/maybach-eqs/", "/maybach/"]
+            )
+            # Si contiene alguna de las palabras clave excluidas, excluir el modelo
+            if not contains_excluded_keywords:
+                passenger_car_model_codes.append(model_key)
+        return passenger_car_model_codes
 
 # Uso de la clase
 if __name__ == "__main__":
@@ -1,19 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import allure
-import requests
 import logging
+import requests
 from App.modelcodesAPI import ModelCodesAPI  # Importing from the separate module
+from App.DeeplinkCache import DeeplinkCache
+from App.HttpClient import get_shared_client
+
+DEFAULT_MAX_WORKERS = 16  # Threads used to fetch the (market, model) matrix
+DEEPLINK_TYPES = ('PRODUCT_PAGE', 'CONFIGURATOR', 'ONLINE_SHOP', 'TEST_DRIVE')
+
 
 class VehicleAPI:
-    def __init__(self, access_token):
-        """Initializes the VehicleAPI class with an access token for making API requests."""
+    def __init__(self, access_token, cache=None, client=None, max_workers=DEFAULT_MAX_WORKERS, bulk=False):
+        """
+        Initializes the VehicleAPI class with an access token for making API requests.
+
+        Args:
+            access_token (str): The access token for the API.
+            cache (DeeplinkCache, optional): Persistent cache for deeplinks responses.
+            client (HttpClient, optional): HTTP client to use. Defaults to the process-wide shared client.
+            max_workers (int): Threads used to fetch several models at once.
+            bulk (bool): Fill deeplinks from the market's model-series listing in fetch_matrix,
+                requesting a model only for the deeplink types the listing does not provide.
+        """
         self.access_token = access_token
-        self.model_codes_api = ModelCodesAPI(access_token)  # Initialize ModelCodesAPI
+        self.cache = cache
+        self.client = client or get_shared_client()
+        self.max_workers = max_workers
+        self.bulk = bulk
+        self.model_codes_api = ModelCodesAPI(access_token, cache=cache, client=self.client)  # Initialize ModelCodesAPI
 
     @allure.step("Fetch URLs from API for market code '{market_code}' and model code '{model_code}'")
     def fetch_urls_from_api(self, market_code, model_code=None):
         """
         Fetches and processes URLs related to the vehicle model from the API.
+
+        Models that could not be fetched are returned as {'MODEL_CODE', 'FETCH_ERROR'} entries,
+        which build_test_cases turns into failing cases.
         """
         if not model_code:
             logging.info(f"Fetching all model codes for market code '{market_code}'...")
@@ -24,49 +48,140 @@ class VehicleAPI:
         else:
             model_codes = [model_code]
 
-        all_urls = []
+        return self._map_concurrently(lambda code: self.fetch_model_urls(market_code, code), model_codes)
+
+    def fetch_model_urls(self, market_code, code, listing_entry=None):
+        """
+        Fetches the URLs for a single model code.
+
+        When the model's entry from the model-series listing is given, its deeplinks are used
+        directly and the model is only requested if some deeplink type is missing from it.
+
+        If the request fails even after the client's retries, the returned dict only holds
+        MODEL_CODE and FETCH_ERROR, so the model stays visible in the plan instead of vanishing.
+        """
+        known = self.deeplinks_from_listing(listing_entry) if listing_entry else {}
 
-        for code in model_codes:
+        if len(known) == len(DEEPLINK_TYPES):
+            data = known
+        else:
             url = f"https://api.oneweb.mercedes-benz.com/vehicle-deeplinks-api/v1/deeplinks/{market_code}/model-series/{code}"
             headers = {
                 "Authorization": f"Bearer {self.access_token}",
                 "Content-Type": "application/json"
             }
 
-            response = requests.get(url, headers=headers)
-
-            if response.status_code == 200:
-                data = response.json()
-                product_page = data.get('PRODUCT_PAGE', {}).get('url', '')
-                configurator_url = data.get('CONFIGURATOR', {}).get('url', '')
-                online_shop = data.get('ONLINE_SHOP', {}).get('url', '')
-                test_drive = data.get('TEST_DRIVE', {}).get('url', '')
-                home_page = self.construct_home_page_url(market_code, product_page, configurator_url)
-                body_type, model_name = self.extract_body_type_and_model_name(product_page, market_code)
-
-                logging.info(f"✅ Successfully fetched URLs for model code '{code}'.")
-                all_urls.append({
-                    'MODEL_CODE': code,  # Ensure model_code is included
-                    'PRODUCT_PAGE': product_page,
-                    'CONFIGURATOR': configurator_url,
-                    'ONLINE_SHOP': online_shop,
-                    'TEST_DRIVE': test_drive,
-                    'HOME_PAGE': home_page,
-                    'BODY_TYPE': body_type,
-                    'MODEL_NAME': model_name
-                })
+            try:
+                status_code, data = self.client.get_json(url, headers, cache=self.cache, market_code=market_code)
+            except requests.exceptions.RequestException as e:
+                logging.error(f"❌ Failed to fetch URLs for model code '{code}'. Error: {e}")
+                return {'MODEL_CODE': code, 'FETCH_ERROR': str(e)}
+
+            if status_code != 200:
+                logging.error(f"❌ Failed to fetch URLs for model code '{code}'. Status code: {status_code}")
+                return {'MODEL_CODE': code, 'FETCH_ERROR': f"Status code: {status_code}"}
+            data = {**data, **known}
+
+        product_page = data.get('PRODUCT_PAGE', {}).get('url', '')
+        configurator_url = data.get('CONFIGURATOR', {}).get('url', '')
+        online_shop = data.get('ONLINE_SHOP', {}).get('url', '')
+        test_drive = data.get('TEST_DRIVE', {}).get('url', '')
+        home_page = self.construct_home_page_url(market_code, product_page, configurator_url)
+        body_type, model_name = self.extract_body_type_and_model_name(product_page, market_code)
+
+        logging.info(f"✅ Successfully fetched URLs for model code '{code}'.")
+        return {
+            'MODEL_CODE': code,  # Ensure model_code is included
+            'PRODUCT_PAGE': product_page,
+            'CONFIGURATOR': configurator_url,
+            'ONLINE_SHOP': online_shop,
+            'TEST_DRIVE': test_drive,
+            'HOME_PAGE': home_page,
+            'BODY_TYPE': body_type,
+            'MODEL_NAME': model_name
+        }
+
+    def fetch_matrix(self, pairs):
+        """
+        Fetches URLs for a whole (market_code, model_code) matrix in parallel.
+
+        Args:
+            pairs (iterable): (market_code, model_code) tuples. A model_code of None means every model in the market.
+
+        Returns:
+            dict: Maps each requested pair to its list of URL dicts. Models that could not be fetched
+                are kept as {'MODEL_CODE', 'FETCH_ERROR'} entries.
+        """
+        pairs = list(dict.fromkeys(pairs))
+
+        # First list the models of every market-wide entry (of every market in bulk mode),
+        # then fetch all models of all markets at once
+        markets = list(dict.fromkeys(market_code for market_code, model_code in pairs if self.bulk or not model_code))
+        listings = dict(zip(markets, self._map_concurrently(self.model_codes_api.fetch_model_series, markets)))
+        model_codes_by_pair = {}
+        for market_code, model_code in pairs:
+            if model_code:
+                model_codes_by_pair[(market_code, model_code)] = [model_code]
             else:
-                logging.error(f"❌ Failed to fetch URLs for model code '{code}'. Status code: {response.status_code}")
+                listing = listings[market_code]
+                model_codes_by_pair[(market_code, model_code)] = self.model_codes_api.passenger_car_model_codes(listing) if listing else []
+                if not model_codes_by_pair[(market_code, model_code)]:
+                    logging.error(f"No model codes found for market code '{market_code}'.")
+
+        jobs = list(dict.fromkeys(
+            (market_code, code) for (market_code, _), codes in model_codes_by_pair.items() for code in codes
+        ))
+        logging.info(f"Fetching {len(jobs)} model deeplinks across {len({job[0] for job in jobs})} markets...")
+        results = dict(zip(jobs, self._map_concurrently(
+            lambda job: self.fetch_model_urls(*job, listing_entry=self._listing_entry(listings, *job)), jobs
+        )))
+
+        return {
+            pair: [results[(pair[0], code)] for code in codes]
+            for pair, codes in model_codes_by_pair.items()
+        }
+
+    def deeplinks_from_listing(self, listing_entry):
+        """
+        Extracts the deeplinks a model-series listing entry already provides.
+
+        Returns:
+            dict: {deeplink type: {'url': ...}} for every type present in the listing entry.
+        """
+        deeplinks = {}
+        for key in DEEPLINK_TYPES:
+            value = listing_entry.get(key)
+            if isinstance(value, dict) and ('url' in value or 'modelSeriesUrl' in value):
+                deeplinks[key] = {'url': value.get('url') or value.get('modelSeriesUrl') or ''}
+        return deeplinks
 
-        return all_urls
+    def _listing_entry(self, listings, market_code, code):
+        """Returns the model's entry from a fetched listing in bulk mode, otherwise None."""
+        if not self.bulk:
+            return None
+        return (listings.get(market_code) or {}).get(code)
+
+    def _map_concurrently(self, function, items):
+        """Applies `function` to every item on a bounded thread pool, preserving the order of the results."""
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(function, items))
 
     def fetch_models_for_market(self, market_code, test_name, model_code=None):
         """
         Fetches models for the given market code and returns a list of test cases.
         """
-        vehicle_api = VehicleAPI("YOUR_ACCESS_TOKEN")  # Replace with your actual access token
-        urls_list = vehicle_api.fetch_urls_from_api(market_code, model_code)
+        urls_list = self.fetch_urls_from_api(market_code, model_code)
+        return self.build_test_cases(test_name, market_code, urls_list)
+
+    def build_test_cases(self, test_name, market_code, urls_list):
+        """
+        Turns a list of URL dicts into test cases, skipping models without MODEL_NAME or BODY_TYPE.
 
+        Models that could not be fetched become cases with a `fetch_error` and no URLs, so they fail visibly.
+        """
         test_cases = []
         for urls in urls_list:
             model_name = urls.get("MODEL_NAME", None)
@@ -74,14 +189,24 @@ class VehicleAPI:
             model_code = urls.get("MODEL_CODE", None)  # Extract model_code from the URLs
             
 
-            if model_name and body_type:
+            if urls.get("FETCH_ERROR"):
+                test_cases.append({
+                    "test_name": test_name,
+                    "market_code": market_code,
+                    "model_code": model_code,
+                    "model_name": None,
+                    "body_type": None,
+                    "urls": {},
+                    "fetch_error": urls["FETCH_ERROR"]
+                })
+            elif model_name and body_type:
                 test_cases.append({
                     "test_name": test_name,
                     "market_code": market_code,
                     "model_code": model_code,
                     "model_name": model_name,
                     "body_type": body_type,
-                    "urls": urls
+                    "urls": dict(urls)  # Each test case gets its own copy, since callers mutate the URLs
                 })
             else:
                 logging.warning(f"⚠️ Skipping model due to missing MODEL_NAME or BODY_TYPE: {urls}")
@@ -150,14 +275,16 @@ if __name__ == "__main__":
     model_code = "C174"  # Replace with a specific model code if needed, e.g., "X123"
 
     # Initialize VehicleAPI
-    vehicle_api = VehicleAPI(access_token)
+    vehicle_api = VehicleAPI(access_token, cache=DeeplinkCache.from_env())
 
     if model_code:
         # Fetch URLs for the specific model
         logging.info(f"Fetching data for specific model code: {model_code}")
         specific_model_urls = vehicle_api.fetch_urls_from_api(market_code, model_code)
 
-        if specific_model_urls:
+        if specific_model_urls and specific_model_urls[0].get('FETCH_ERROR'):
+            print(f"Model Code: {model_code} could not be fetched: {specific_model_urls[0]['FETCH_ERROR']}")
+        elif specific_model_urls:
             print(f"Model Code: {specific_model_urls[0]['MODEL_CODE']}")
             print(f"Product Page: {specific_model_urls[0]['PRODUCT_PAGE']}")
             print(f"Configurator: {specific_model_urls[0]['CONFIGURATOR']}")
@@ -186,6 +313,10 @@ if __name__ == "__main__":
             print("\nFetched URLs for All Models:")
             for model in all_model_urls:
                 print(f"Model Code: {model['MODEL_CODE']}")
+                if model.get('FETCH_ERROR'):
+                    print(f"Fetch Error: {model['FETCH_ERROR']}")
+                    print("-" * 50)
+                    continue
                 print(f"Product Page: {model['PRODUCT_PAGE']}")
                 print(f"Configurator: {model['CONFIGURATOR']}")
                 print(f"Online Shop: {model['ONLINE_SHOP']}")
@@ -1,7 +1,6 @@
 # Standard Library Imports
 import unittest
 import os
-import time
 import json
 import logging
 import sys
@@ -17,7 +16,6 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Third-Party Imports
 from selenium import webdriver 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium.webdriver.common.action_chains import ActionChains
@@ -26,6 +24,8 @@ import requests
 # Local Module Imports
 from App.vehicle_api import VehicleAPI  # Importing from the separate module
 from App.modelcodesAPI import ModelCodesAPI
+from App.TestPlan import case_uid
+from App.TestPlan import get_session_plan
 from App.ImageVerifier import ImageVerifier  # Importing from the separate module
 from App.ScreenshotHandler import ScreenshotHandler  # Importing from the separate module
 from App.XHRResponseCapturer import XHRResponseCapturer  # Importing from the separate module
@@ -35,7 +35,12 @@ from App.CTAVerifier import CTAVerifier   # Importing from the separate module
 from App.CreateDriver import create_driver
 from App.CreateDriver import restart_driver
 from App.CreateDriver import build_chrome_options
+from App.CreateDriver import get_driver_pool
 from App.CreateAPIandXHR import create_api_and_xhr
+from App.ResourcePolicy import set_resource_phase
+from App.StepTimings import AdaptiveWait, set_current_market
+from App.TestSteps import navigate
+from App.Waits import shadow_element_present, start_network_tracking, stop_network_tracking, wait_until
 from App.VerifyPersonalizationAndCapture import verify_personalization_and_capture
 from TestsCodes import test_bfv1
 from TestsCodes import test_bfv2
@@ -135,9 +140,10 @@ def run_test(driver, test_name, market_code, model_code, model_name, body_type,
             pytest.skip(message)
 
     try:
+        # Journey pages only need to emit Evergage events; the journey restores full rendering for its last page
+        set_resource_phase(driver, "journey")
         with allure.step(f"🌍 Navigating to HOME_PAGE: {urls['HOME_PAGE']}"):
-            driver.get(urls['HOME_PAGE'])
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
+            navigate(driver, urls['HOME_PAGE'], "home", 15, step="initial_home_page")
             logging.info(f"🌍 Navigated to: {urls['HOME_PAGE']}")
     except Exception as e:
         logging.error(f"❌ Error navigating to HOME_PAGE: {e}")
@@ -145,10 +151,10 @@ def run_test(driver, test_name, market_code, model_code, model_name, body_type,
 
     try:
         with allure.step("✅ Detecting and accepting cookies"):
-            WebDriverWait(driver, 6).until(
+            AdaptiveWait(driver, "cookie_banner", 6).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "cmm-cookie-banner"))
             )
-            time.sleep(2)
+            wait_until(driver, shadow_element_present("cmm-cookie-banner", "wb7-button.button--accept-all"), 2)
             logging.info("✅ Cookie banner detected.")
             driver.execute_script("""
                 document.querySelector("cmm-cookie-banner").shadowRoot.querySelector("wb7-button.button--accept-all").click();
@@ -228,40 +234,17 @@ manual_test_cases = [
     
 ]
 
-# Fetch dynamic test cases for manual model codes
-dynamic_test_cases = []
-vehicle_api = VehicleAPI("YOUR_ACCESS_TOKEN")  # Replace with your actual access token
-
-for manual_case in manual_test_cases:
-    market_code = manual_case["market_code"]
-    test_name = manual_case["test_name"]
-    model_code = manual_case.get("model_code", None)  # Get model_code, default to None if not provided
-
-    # Fetch URLs for the specific model code or all models if model_code is not provided
-    fetched_cases = vehicle_api.fetch_models_for_market(market_code, test_name, model_code=model_code)
-    if fetched_cases:
-        for case in fetched_cases:
-            # Append the test-specific query parameter to all URLs
-            if "urls" in case:
-                for key, url in case["urls"].items():
-                    if url and key == "HOME_PAGE":  # Ensure the URL is not None and the key is HOME_PAGE
-                        case["urls"][key] = f"{url}?usecaselivetest=true"  
+def pytest_generate_tests(metafunc):
+    """
+    Parametrizes test_run with the resolved manual cases.
 
-        if model_code:
-            # Update the manual case with the fetched URLs for the specific model
-            manual_case["urls"] = fetched_cases[0].get("urls", {})
-            manual_case["model_name"] = fetched_cases[0].get("model_name", None)
-            manual_case["body_type"] = fetched_cases[0].get("body_type", None)
-        else:
-            # Add all fetched cases to dynamic_test_cases if no model_code is provided
-            dynamic_test_cases.extend(fetched_cases)
-    else:
-        logging.warning(f"⚠️ No URLs found for manual case: {manual_case}")
+    The plan is built once per session (in the xdist controller when running with -n),
+    where each distinct (market, model) lookup is fetched once and shared by every test type.
+    """
+    if "test_case" in metafunc.fixturenames:
+        metafunc.parametrize("test_case", get_session_plan(metafunc.config, manual_test_cases))
 
-# Combine manual and dynamic test cases
-all_test_cases = manual_test_cases + dynamic_test_cases
 
-@pytest.mark.parametrize("test_case", all_test_cases)
 def test_run(test_case, screenshot_dir):
     """
     Runs a test for each test case, either manually defined or dynamically fetched.
@@ -276,6 +259,13 @@ def test_run(test_case, screenshot_dir):
     # Log test case details
     logging.info(f"Running test case: {json.dumps(test_case, indent=2)}")
 
+    # Models whose deeplinks could not be fetched stay in the plan and fail here instead of disappearing
+    if test_case.get('fetch_error'):
+        message = f"❌ Could not fetch deeplinks for test '{test_name}' (market: {market_code}, model: {model_code}): {test_case['fetch_error']}"
+        logging.error(message)
+        allure.attach(message, name="Deeplinks Fetch Error", attachment_type=allure.attachment_type.TEXT)
+        pytest.fail(message)
+
     # Validate URLs
     if not urls or 'HOME_PAGE' not in urls or not urls['HOME_PAGE']:
         logging.error(f"❌ Missing HOME_PAGE URL for test '{test_name}' (market: {market_code}, model: {model_code}).")
@@ -284,15 +274,17 @@ def test_run(test_case, screenshot_dir):
     
     
     # Generar ID único y consistente para Allure
-    uid_raw = f"{test_name}_{market_code}_{model_code or 'unknown'}"
-    uid_hashed = hashlib.md5(uid_raw.encode()).hexdigest()
-    allure.dynamic.id(uid_hashed)
+    allure.dynamic.id(test_case.get('allure_uid') or case_uid(test_name, market_code, model_code))
 
-    # Define browser options and create driver
-    options = build_chrome_options()
-    driver = create_driver(options)
+    # Take a clean browser from this worker's pool
+    driver_pool = get_driver_pool()
+    driver = driver_pool.acquire()
+    api_and_xhr = None
 
     try:
+        set_current_market(market_code)  # Waits of this test use and feed the timings learned for its market
+        start_network_tracking(driver)
+
         # Set Allure suite hierarchy
         allure.dynamic.parent_suite(f"{market_code}")  # Parent Suite
         allure.dynamic.suite(f"{test_name}")  # Suite
@@ -339,5 +331,11 @@ def test_run(test_case, screenshot_dir):
             )
             raise
     finally:
-        driver.quit()
-        logging.info("✅ Driver closed after test.")
\ No newline at end of file
+        try:
+            if api_and_xhr is not None and api_and_xhr[1] is not None:
+                api_and_xhr[1].close()
+            stop_network_tracking(driver)
+        finally:
+            # The driver must go back to the pool even if the cleanup above fails
+            driver_pool.release(driver, urls)
+            logging.info("✅ Driver returned to the pool after test.")
\ No newline at end of file
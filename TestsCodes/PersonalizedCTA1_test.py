@@ -1,8 +1,9 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.Waits import page_tracked, wait_until
 
 class PersonalizedCTA1Test:
     def __init__(self, driver, urls, test_link=None):
@@ -38,18 +39,17 @@ class PersonalizedCTA1Test:
     def perform_PersonalizedCTA1_test(self):
         """Perform the main Personalized CTA Affinity test logic."""
         # Navigate to the product page
-        self.driver.get(self.urls['PRODUCT_PAGE'])
+        navigate(self.driver, self.urls['PRODUCT_PAGE'], "product")
         logging.info(f"🌍 Navigated to: {self.urls['PRODUCT_PAGE']}")
-        time.sleep(3)
+        wait_until(self.driver, page_tracked(), 3)
         
         # Navigate back to the product page
-        self.driver.get(self.urls['PRODUCT_PAGE'])
+        set_resource_phase(self.driver, "verify")
+        navigate(self.driver, self.urls['PRODUCT_PAGE'], "product", 20)
         logging.info(f"🌍 Navigated back to: {self.urls['PRODUCT_PAGE']}")
-        WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
 
     def navigate_to_salesforce(self):
         """Navigate to the Salesforce URL if test_link is provided."""
         salesforce_url = self.urls['PRODUCT_PAGE'] + self.test_link
-        self.driver.get(salesforce_url)
-        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
\ No newline at end of file
+        navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
+        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
\ No newline at end of file
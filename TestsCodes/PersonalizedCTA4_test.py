@@ -1,9 +1,11 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from App.ConfigCompleted import ConfiguratorCompleted
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.StepTimings import AdaptiveWait
+from App.Waits import all_of, configurator_ready, page_tracked, url_changed, wait_until
 
 class PersonalizedCTA4Test:
     def __init__(self, driver, urls, test_link=None):
@@ -39,14 +41,14 @@ class PersonalizedCTA4Test:
     def perform_PersonalizedCTA4_test(self):
         """Perform the main Personalized CTA PDP + OWCC test logic."""
         # Navigate to the product page
-        self.driver.get(self.urls['PRODUCT_PAGE'])
+        navigate(self.driver, self.urls['PRODUCT_PAGE'], "product")
         logging.info(f"🌍 Navigated to: {self.urls['PRODUCT_PAGE']}")
-        time.sleep(3)
+        wait_until(self.driver, page_tracked(), 3)
         
         # Navigate to CONFIGURATOR
-        self.driver.get(self.urls['CONFIGURATOR'])
+        navigate(self.driver, self.urls['CONFIGURATOR'], "configurator")
         logging.info(f"🌍 Navigated to: {self.urls['CONFIGURATOR']}")
-        time.sleep(4)
+        wait_until(self.driver, configurator_ready(), 4)
         logging.info("🔍 Running Personalized CTA 4 Test...")
         
         # Initialize ConfiguratorCompleted
@@ -58,25 +60,25 @@ class PersonalizedCTA4Test:
         logging.info("✅ Completed actions in the configurator.")
         
         # Navigate to ONLINE STORE
-        self.driver.get(self.urls['ONLINE_SHOP'])
+        navigate(self.driver, self.urls['ONLINE_SHOP'], "srp")
         logging.info(f"🌍 Navigated to: {self.urls['ONLINE_SHOP']}")
-        element = WebDriverWait(self.driver, 20).until(
+        element = AdaptiveWait(self.driver, "srp_tiles", 20).until(
         EC.element_to_be_clickable((By.CSS_SELECTOR, "img.wbx-vehicle-tile__image-img"))
         )
+        search_results_url = self.driver.current_url
         element.click()
         logging.info(f"🌍 Clicked First Search Result")
 
         logging.info(f"🌍 Waiting for Loading of PDP_Element")
-        time.sleep(4)
+        wait_until(self.driver, all_of(url_changed(search_results_url), page_tracked()), 4)
         
         # Navigate back to the product page
-        self.driver.get(self.urls['PRODUCT_PAGE'])
+        set_resource_phase(self.driver, "verify")
+        navigate(self.driver, self.urls['PRODUCT_PAGE'], "product", 40)
         logging.info(f"🌍 Navigated back to: {self.urls['PRODUCT_PAGE']}")
-        WebDriverWait(self.driver, 40).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
 
     def navigate_to_salesforce(self):
         """Navigate to the Salesforce URL if test_link is provided."""
         salesforce_url = self.urls['PRODUCT_PAGE'] + self.test_link
-        self.driver.get(salesforce_url)
-        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
\ No newline at end of file
+        navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
+        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
\ No newline at end of file
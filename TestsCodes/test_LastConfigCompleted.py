@@ -1,12 +1,13 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 import allure
 import uuid
 from App.ConfigCompleted import ConfiguratorCompleted  # Import the ConfiguratorCompleted class
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.Waits import configurator_ready, wait_for_network_idle, wait_until
 
 # Generar un UUID consistente para el test usando el nombre del test
 def generate_test_uuid(test_name):
@@ -55,16 +56,16 @@ class LCCompletedTest:
         try:
             # Navigate to CONFIGURATOR
             with allure.step(f"🌍 Navigated to: {self.urls['CONFIGURATOR']}"):
-                self.driver.get(self.urls['CONFIGURATOR'])
+                navigate(self.driver, self.urls['CONFIGURATOR'], "configurator")
                 logging.info(f"🌍 Navigated to: {self.urls['CONFIGURATOR']}")
-                time.sleep(4)
+                wait_until(self.driver, configurator_ready(), 4)
 
             # Execute actions in CONFIGURATOR
             with allure.step("✅ Performing configuration actions"):
                 try:
                     configurator.perform_configurator_actions()
                     logging.info("✅ Successfully performed configuration actions.")
-                    time.sleep(2)
+                    wait_for_network_idle(self.driver, timeout=2)
                 except Exception as e:
                     logging.error(f"❌ Error performing configuration actions: {e}")
                     allure.attach(f"Error: {e}", name="Configuration Actions Error", attachment_type=allure.attachment_type.TEXT)
@@ -74,16 +75,14 @@ class LCCompletedTest:
         
         # Navigate back to the home page
         with allure.step(f"🌍 Navigated back to: {self.urls['HOME_PAGE']}"):
-            self.driver.get(self.urls['HOME_PAGE'])
+            set_resource_phase(self.driver, "verify")
+            navigate(self.driver, self.urls['HOME_PAGE'], "home", 25)
             logging.info(f"🌍 Navigated back to: {self.urls['HOME_PAGE']}")
-            WebDriverWait(self.driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(4)
 
     @allure.step("Navigate to Salesforce URL")
     @allure.id(generate_test_uuid("navigate_to_salesforce"))  # UUID consistent for this step
     def navigate_to_salesforce(self):
         """Navigate to the Salesforce URL if test_link is provided."""
         salesforce_url = self.urls['HOME_PAGE'] + self.test_link
-        self.driver.get(salesforce_url)
-        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
\ No newline at end of file
+        navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
+        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
\ No newline at end of file
@@ -1,12 +1,13 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 import allure
 import uuid
 from App.ConfigStarted import ConfiguratorStarted  # Import the ConfiguratorStarted class
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.Waits import configurator_ready, wait_for_network_idle, wait_until
 
 # Generate a consistent UUID for the test using the test name
 def generate_test_uuid(test_name):
@@ -48,17 +49,16 @@ class LCStartedTest:
         try:
              # Navigate to the configurator and perform actions
             with allure.step(f"🌍 Navigated to: {self.urls['CONFIGURATOR']}"):
-                self.driver.get(self.urls['CONFIGURATOR'])
+                navigate(self.driver, self.urls['CONFIGURATOR'], "configurator", 15)
                 logging.info(f"🌍 Navigating to the configurator: {self.urls['CONFIGURATOR']}")
-                WebDriverWait(self.driver, 15).until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-                time.sleep(4)
+                wait_until(self.driver, configurator_ready(), 4)
 
             # Call the perform_configurator_actions function from ConfiguratorStarted
             with allure.step("✅ Performing configuration actions"):
                 try:
                     configurator.perform_configurator_actions()
                     logging.info("✅ Successfully performed configuration actions.")
-                    time.sleep(4)
+                    wait_for_network_idle(self.driver, timeout=4)
                 except Exception as e:
                     logging.error(f"❌ Error performing configuration actions: {e}")
                     allure.attach(f"Error: {e}", name="Configuration Actions Error", attachment_type=allure.attachment_type.TEXT)
@@ -66,10 +66,9 @@ class LCStartedTest:
                 
             # Navigate back to the home page
             with allure.step(f"🌍 Navigating back to: {self.urls['HOME_PAGE']}"):
-                self.driver.get(self.urls['HOME_PAGE'])
+                set_resource_phase(self.driver, "verify")
+                navigate(self.driver, self.urls['HOME_PAGE'], "home", 20)
                 logging.info(f"🌍 Navigating back to: {self.urls['HOME_PAGE']}")
-                WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(3)
                         
         except Exception as e:
             logging.error(f"❌ Error in configurator: {e}")        
@@ -80,9 +79,8 @@ class LCStartedTest:
         """Navigates to the Salesforce link if provided."""
         try:
             salesforce_url = self.urls['HOME_PAGE'] + self.test_link
-            self.driver.get(salesforce_url)
+            navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
             logging.info(f"🌍 Navigating to Salesforce URL: {salesforce_url}")
-            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         except Exception as e:
             logging.error(f"❌ Error navigating to Salesforce URL: {e}")
             allure.attach(f"Error: {e}", name="Salesforce Navigation Error", attachment_type=allure.attachment_type.TEXT)
\ No newline at end of file
@@ -1,11 +1,13 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 import allure
 import uuid
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.StepTimings import AdaptiveWait
+from App.Waits import page_tracked, wait_until
 
 # Generar un UUID consistente para el test usando el nombre del test
 def generate_test_uuid(test_name):
@@ -56,19 +58,18 @@ class LSeenSRPTest:
         try:
             # Navigate to ONLINE STORE
             with allure.step(f"🌍 Navigated to: {self.urls['ONLINE_SHOP']}"):
-                self.driver.get(self.urls['ONLINE_SHOP'])
-                element = WebDriverWait(self.driver, 20).until(
+                navigate(self.driver, self.urls['ONLINE_SHOP'], "srp")
+                element = AdaptiveWait(self.driver, "srp_tiles", 20).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, "img.wbx-vehicle-tile__image-img"))
         )
             logging.info(f"🌍 Navigated to: {self.urls['ONLINE_SHOP']}")
-            time.sleep(4)
+            wait_until(self.driver, page_tracked(), 4)
                         
             # Navigate back to HOME_PAGE
             with allure.step(f"🌍 Navigated back to: {self.urls['HOME_PAGE']}"):
-                self.driver.get(self.urls['HOME_PAGE'])
+                set_resource_phase(self.driver, "verify")
+                navigate(self.driver, self.urls['HOME_PAGE'], "home", 20)
                 logging.info(f"🌍 Navigated back to: {self.urls['HOME_PAGE']}")
-                WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(3)
 
         except Exception as e:
             logging.error(f"❌ Error during Last Seen SRP: {e}")
@@ -79,6 +80,5 @@ class LSeenSRPTest:
     def navigate_to_salesforce(self):
         """Navigate to the Salesforce URL if test_link is provided."""
         salesforce_url = self.urls['HOME_PAGE'] + self.test_link
-        self.driver.get(salesforce_url)
-        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
\ No newline at end of file
+        navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
+        logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
\ No newline at end of file
@@ -1,12 +1,13 @@
 import logging
 import allure
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pytest
 from App.CreateDriver import driver 
 import uuid
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.Waits import page_tracked, wait_until
 
 # Generar un UUID consistente para el test usando el nombre del test
 def generate_test_uuid(test_name):
@@ -53,24 +54,22 @@ class BFV1Test:
         """Perform the main BFV1 test logic."""
         # Navigate to the product page
         with allure.step(f"🌍 Navigating to: {self.urls['PRODUCT_PAGE']}"):
-            self.driver.get(self.urls['PRODUCT_PAGE'])
+            navigate(self.driver, self.urls['PRODUCT_PAGE'], "product")
             logging.info(f"🌍 Navigated to: {self.urls['PRODUCT_PAGE']}")
-            time.sleep(3)
+            wait_until(self.driver, page_tracked(), 3)
 
         # Navigate back to the home page
         with allure.step(f"🌍 Navigating back to: {self.urls['HOME_PAGE']}"):
-            self.driver.get(self.urls['HOME_PAGE'])
+            set_resource_phase(self.driver, "verify")
+            navigate(self.driver, self.urls['HOME_PAGE'], "home", 20)
             logging.info(f"🌍 Navigated back to: {self.urls['HOME_PAGE']}")
-            WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(3)
 
     @allure.step("Navigate to Salesforce URL")
     @allure.id(generate_test_uuid("navigate_to_salesforce"))  # UUID consistente para este paso
     def navigate_to_salesforce(self):
         """Navigate to the Salesforce URL if test_link is provided."""
         salesforce_url = self.urls['HOME_PAGE'] + self.test_link
-        self.driver.get(salesforce_url)
+        navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
         logging.info(f"🌍 Navigated to Salesforce URL: {salesforce_url}")
-        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
 
 
@@ -1,7 +1,5 @@
 import logging
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 import allure
@@ -9,6 +7,9 @@ import pytest
 from App.CreateDriver import driver
 import uuid
 from App.ConfigStarted import ConfiguratorStarted  # Import the ConfiguratorStarted class
+from App.ResourcePolicy import set_resource_phase
+from App.TestSteps import navigate
+from App.Waits import configurator_ready, page_tracked, wait_until
 
 # Generate a consistent UUID for the test using the test name
 def generate_test_uuid(test_name):
@@ -47,15 +48,15 @@ class BFV2Test:
             
         # Navigate to the product page
         with allure.step(f"🌍 Navigating to: {self.urls['PRODUCT_PAGE']}"):
-            self.driver.get(self.urls['PRODUCT_PAGE'])
+            navigate(self.driver, self.urls['PRODUCT_PAGE'], "product")
             logging.info(f"🌍 Navigating to: {self.urls['PRODUCT_PAGE']}")
-            time.sleep(3)
+            wait_until(self.driver, page_tracked(), 3)
 
         # Navigate to the configurator
         with allure.step(f"🌍 Navigating to: {self.urls['CONFIGURATOR']}"):
-            self.driver.get(self.urls['CONFIGURATOR'])
+            navigate(self.driver, self.urls['CONFIGURATOR'], "configurator")
             logging.info(f"🌍 Navigating to: {self.urls['CONFIGURATOR']}")
-            time.sleep(4)
+            wait_until(self.driver, configurator_ready(), 4)
 
         # Call the perform_configurator_actions function from ConfiguratorStarted
         with allure.step("✅ Performing configuration actions"):
@@ -69,10 +70,9 @@ class BFV2Test:
 
         # Navigate back to the home page
         with allure.step(f"🌍 Navigating back to: {self.urls['HOME_PAGE']}"):
-            self.driver.get(self.urls['HOME_PAGE'])
+            set_resource_phase(self.driver, "verify")
+            navigate(self.driver, self.urls['HOME_PAGE'], "home", 20)
             logging.info(f"🌍 Navigating back to: {self.urls['HOME_PAGE']}")
-            WebDriverWait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(3)
 
     @allure.step("Navigate to Salesforce URL")
     @allure.id(generate_test_uuid("navigate_to_salesforce"))  # Consistent UUID for this step
@@ -80,9 +80,8 @@ class BFV2Test:
         """Navigates to the Salesforce link if provided."""
         try:
             salesforce_url = self.urls['HOME_PAGE'] + self.test_link
-            self.driver.get(salesforce_url)
+            navigate(self.driver, salesforce_url, "page", 10, step="salesforce_link")
             logging.info(f"🌍 Navigating to Salesforce URL: {salesforce_url}")
-            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         except Exception as e:
             logging.error(f"❌ Error navigating to Salesforce URL: {e}")
             allure.attach(f"Error: {e}", name="Salesforce Navigation Error", attachment_type=allure.attachment_type.TEXT)
\ No newline at end of file
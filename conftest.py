@@ -0,0 +1,217 @@
+import json
+import os
+import time
+
+import pytest
+
+from App.CreateDriver import shutdown_driver_pool
+from App.TestPlan import SESSION_PLAN_KEY, get_session_plan, save_test_plan
+
+failed_uids = set()  # Allure ids of the cases that failed in this session
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("deeplinks", "Vehicle deeplinks API")
+    group.addoption("--refresh-deeplinks", action="store_true", default=False,
+                    help="Ignore cached deeplinks and fetch every market again from the API.")
+    group.addoption("--deeplink-cache", default=None, metavar="PATH",
+                    help="SQLite file used to cache deeplinks between runs (default: .cache/deeplinks.sqlite).")
+    group.addoption("--deeplink-ttl", type=float, default=None, metavar="HOURS",
+                    help="Hours a cached deeplinks response stays fresh (default: 168).")
+    group.addoption("--deeplink-market-ttl", action="append", default=[], metavar="MARKET=HOURS",
+                    help="Per-market TTL override, e.g. --deeplink-market-ttl FR/fr=24. Can be repeated.")
+
+    group.addoption("--bulk-deeplinks", action="store_true", default=False,
+                    help="Fill deeplinks from each market's model-series listing and only request models it does not fully cover.")
+    group.addoption("--http-pool-size", type=int, default=None, metavar="N",
+                    help="Keep-alive connections per host for the deeplinks API client (default: 16).")
+    group.addoption("--http-per-host-limit", type=int, default=None, metavar="N",
+                    help="Concurrent requests allowed against a single API host (default: 8).")
+    group.addoption("--http-connect-timeout", type=float, default=None, metavar="SECONDS",
+                    help="Connect timeout for deeplinks API requests (default: 5).")
+    group.addoption("--http-read-timeout", type=float, default=None, metavar="SECONDS",
+                    help="Read timeout for deeplinks API requests (default: 30).")
+    group.addoption("--http2", action="store_true", default=False,
+                    help="Use HTTP/2 for deeplinks API requests (requires httpx[http2]).")
+    group.addoption("--http-rate-limit", type=float, default=None, metavar="RPS",
+                    help="Requests per second allowed against the deeplinks API, 0 to disable (default: 20).")
+    group.addoption("--http-max-retries", type=int, default=None, metavar="N",
+                    help="Retries for throttled (429/503) or failed deeplinks API requests (default: 5).")
+
+    group = parser.getgroup("browser", "Browser management")
+    group.addoption("--browser-pool-max-uses", type=int, default=None, metavar="N",
+                    help="Tests served by one pooled Chrome before it is recycled, 1 to launch a browser per test (default: 20).")
+    group.addoption("--browser-lookahead", type=int, default=None, metavar="N",
+                    help="Spare browsers (0-2) started in the background while a test runs (default: 1).")
+    group.addoption("--browser-max-memory", type=int, default=None, metavar="MB",
+                    help="Memory budget for the browsers of one worker; no spare is started beyond it (default: 2048).")
+    group.addoption("--browser-memory-estimate", type=int, default=None, metavar="MB",
+                    help="Estimated memory used by one headless Chrome (default: 500).")
+    group.addoption("--browser-isolation", choices=("process", "context"), default=None,
+                    help="'process' resets the pooled browser between tests, 'context' runs each test in its own "
+                         "CDP browser context (default: process).")
+
+    group.addoption("--chrome-version", default=None, metavar="VERSION",
+                    help="Pin the Chrome version resolved by Selenium Manager, e.g. 'stable' or '122'.")
+    group.addoption("--browser-binaries-cache", default=None, metavar="PATH",
+                    help="JSON file caching the resolved chromedriver/Chrome paths (default: .cache/chrome-binaries.json).")
+    group.addoption("--browser-disk-cache", default=None, metavar="DIR",
+                    help="Keep Chrome's HTTP cache in DIR across browser launches instead of using incognito mode. "
+                         "Cookies and storage stay isolated in a temporary profile per browser.")
+    group.addoption("--page-load-strategy", choices=("normal", "eager", "none"), default=None,
+                    help="'normal' waits for the load event on every navigation, 'eager' only for the parsed DOM, "
+                         "'none' returns at once; the journeys then continue on per-page readiness probes (default: normal).")
+    group.addoption("--no-resource-blocking", action="store_true", default=False,
+                    help="Load every image, video, font and third-party script during the journey steps.")
+    group.addoption("--no-network-tracking", action="store_true", default=False,
+                    help="Detect network idle from the page's resource timing instead of tracking in-flight "
+                         "requests over a CDP session.")
+    group.addoption("--network-idle-ignore", action="append", default=[], metavar="PATTERN",
+                    help="URL pattern (e.g. '*longpoll*') never counted when waiting for network idle. Can be repeated.")
+
+    group = parser.getgroup("capture", "Evergage response capture")
+    group.addoption("--xhr-capture-mode", choices=("log", "stream", "inpage", "fetch"), default=None,
+                    help="'log' reads the performance log after the journey, 'stream' records Evergage responses "
+                         "as they arrive over a CDP websocket session, 'inpage' records them with a script "
+                         "injected in every page, 'fetch' intercepts only the Evergage responses (default: log).")
+    group.addoption("--evergage-stubs", default=None, metavar="PATH",
+                    help="With --xhr-capture-mode fetch, answer Evergage requests from this JSON file of "
+                         "{url substring: response body} instead of the network.")
+    group.addoption("--perf-log-drain-interval", type=float, default=None, metavar="SECONDS",
+                    help="Read Chrome's performance log in the background every SECONDS, 0 to read it only "
+                         "at capture time (default: 1).")
+    group.addoption("--perf-log-buffer", type=int, default=None, metavar="N",
+                    help="Evergage log entries kept between two captures (default: 500).")
+    group.addoption("--cdp-max-post-data-size", type=int, default=None, metavar="BYTES",
+                    help="Longest request body Chrome keeps in network events (default: 65536).")
+    group.addoption("--cdp-max-resource-buffer", type=int, default=None, metavar="BYTES",
+                    help="Per-response buffer Chrome keeps for Network.getResponseBody (default: Chrome's).")
+    group.addoption("--cdp-max-total-buffer", type=int, default=None, metavar="BYTES",
+                    help="Total response buffer Chrome keeps for Network.getResponseBody (default: Chrome's).")
+
+    group = parser.getgroup("timings", "Adaptive timeouts")
+    group.addoption("--step-timings", default=None, metavar="PATH",
+                    help="SQLite file recording per-market step times between runs (default: .cache/step-timings.sqlite).")
+    group.addoption("--timeout-margin", type=float, default=None, metavar="FACTOR",
+                    help="Learned timeout = p99 of a market's recorded step times x FACTOR (default: 2).")
+    group.addoption("--no-adaptive-timeouts", action="store_true", default=False,
+                    help="Keep recording step times but always use the fixed timeouts.")
+
+    group = parser.getgroup("testplan", "Test plan snapshots")
+    group.addoption("--save-plan", default=None, metavar="PATH",
+                    help="Write the resolved test cases to PATH (.json or .json.gz).")
+    group.addoption("--load-plan", default=None, metavar="PATH",
+                    help="Run the test cases stored in PATH instead of calling the deeplinks API.")
+    group.addoption("--save-failed-plan", default=None, metavar="PATH",
+                    help="Write the cases that failed in this run to PATH, ready for --load-plan.")
+    group.addoption("--test-dictionaries", default=None, metavar="DIR",
+                    help="Plan every entry of the JSON files in DIR (e.g. tests_dictionaries) instead of the manual test cases.")
+
+
+def pytest_configure(config):
+    # xdist workers inherit the controller's environment, so only the controller exports the settings
+    if hasattr(config, "workerinput"):
+        return
+
+    if config.getoption("refresh_deeplinks"):
+        # Entries fetched before this moment are stale; the first worker to refetch a URL refreshes it for everyone
+        os.environ["DEEPLINK_REFRESH_AFTER"] = str(time.time())
+    if config.getoption("deeplink_cache"):
+        os.environ["DEEPLINK_CACHE_PATH"] = os.path.abspath(config.getoption("deeplink_cache"))
+    if config.getoption("deeplink_ttl") is not None:
+        os.environ["DEEPLINK_CACHE_TTL"] = str(config.getoption("deeplink_ttl") * 3600)
+    if config.getoption("deeplink_market_ttl"):
+        market_ttls = {}
+        for override in config.getoption("deeplink_market_ttl"):
+            market_code, _, hours = override.partition("=")
+            market_ttls[market_code.strip()] = float(hours) * 3600
+        os.environ["DEEPLINK_CACHE_MARKET_TTLS"] = json.dumps(market_ttls)
+    for option, variable in (("http_pool_size", "HTTP_CLIENT_POOL_SIZE"),
+                             ("http_per_host_limit", "HTTP_CLIENT_PER_HOST_LIMIT"),
+                             ("http_connect_timeout", "HTTP_CLIENT_CONNECT_TIMEOUT"),
+                             ("http_read_timeout", "HTTP_CLIENT_READ_TIMEOUT"),
+                             ("http_rate_limit", "HTTP_CLIENT_RATE_LIMIT"),
+                             ("http_max_retries", "HTTP_CLIENT_MAX_RETRIES")):
+        if config.getoption(option) is not None:
+            os.environ[variable] = str(config.getoption(option))
+    if config.getoption("http2"):
+        os.environ["HTTP_CLIENT_HTTP2"] = "1"
+    for option, variable in (("browser_pool_max_uses", "BROWSER_POOL_MAX_USES"),
+                             ("browser_lookahead", "BROWSER_LOOKAHEAD"),
+                             ("browser_max_memory", "BROWSER_MAX_MEMORY_MB"),
+                             ("browser_memory_estimate", "BROWSER_MEMORY_MB"),
+                             ("browser_isolation", "BROWSER_ISOLATION")):
+        if config.getoption(option) is not None:
+            os.environ[variable] = str(config.getoption(option))
+    if config.getoption("chrome_version"):
+        os.environ["CHROME_VERSION"] = config.getoption("chrome_version")
+    if config.getoption("browser_binaries_cache"):
+        os.environ["BROWSER_BINARIES_CACHE"] = os.path.abspath(config.getoption("browser_binaries_cache"))
+    if config.getoption("browser_disk_cache"):
+        os.environ["BROWSER_DISK_CACHE_DIR"] = os.path.abspath(config.getoption("browser_disk_cache"))
+    if config.getoption("page_load_strategy"):
+        os.environ["PAGE_LOAD_STRATEGY"] = config.getoption("page_load_strategy")
+    if config.getoption("no_resource_blocking"):
+        os.environ["RESOURCE_BLOCKING"] = "0"
+    if config.getoption("no_network_tracking"):
+        os.environ["NETWORK_IDLE_TRACKING"] = "0"
+    if config.getoption("network_idle_ignore"):
+        os.environ["NETWORK_IDLE_IGNORE"] = ",".join(config.getoption("network_idle_ignore"))
+    if config.getoption("xhr_capture_mode"):
+        os.environ["XHR_CAPTURE_MODE"] = config.getoption("xhr_capture_mode")
+    if config.getoption("evergage_stubs"):
+        os.environ["XHR_FETCH_STUBS"] = os.path.abspath(config.getoption("evergage_stubs"))
+    for option, variable in (("perf_log_drain_interval", "XHR_LOG_DRAIN_INTERVAL"),
+                             ("perf_log_buffer", "XHR_LOG_BUFFER_SIZE"),
+                             ("cdp_max_post_data_size", "CDP_MAX_POST_DATA_SIZE"),
+                             ("cdp_max_resource_buffer", "CDP_MAX_RESOURCE_BUFFER_SIZE"),
+                             ("cdp_max_total_buffer", "CDP_MAX_TOTAL_BUFFER_SIZE")):
+        if config.getoption(option) is not None:
+            os.environ[variable] = str(config.getoption(option))
+    if config.getoption("step_timings"):
+        os.environ["STEP_TIMINGS_PATH"] = os.path.abspath(config.getoption("step_timings"))
+    if config.getoption("timeout_margin") is not None:
+        os.environ["STEP_TIMINGS_MARGIN"] = str(config.getoption("timeout_margin"))
+    if config.getoption("no_adaptive_timeouts"):
+        os.environ["STEP_TIMINGS_ADAPTIVE"] = "0"
+
+
+def collects_test_plan(config):
+    """Checks whether QAAppAllure.py, the only module parametrized by the test plan, was passed on the command line."""
+    return any(os.path.basename(arg.split("::")[0]) == "QAAppAllure.py" for arg in config.args)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Resolves the test plan once in the xdist controller and ships it to every worker."""
+    if not collects_test_plan(node.config):
+        return  # e.g. `pytest tests -n 2`: no deeplinks to fetch
+    from QAAppAllure import manual_test_cases
+
+    node.workerinput["test_plan"] = get_session_plan(node.config, manual_test_cases)
+
+
+def pytest_itemcollected(item):
+    # Reports carry the Allure id back to the controller, so failed cases can be matched to the plan
+    callspec = getattr(item, "callspec", None)
+    test_case = callspec.params.get("test_case") if callspec else None
+    if isinstance(test_case, dict) and test_case.get("allure_uid"):
+        item.user_properties.append(("allure_uid", test_case["allure_uid"]))
+
+
+def pytest_runtest_logreport(report):
+    # Under xdist the controller receives every worker's reports, so it sees all failures
+    if report.failed:
+        uid = dict(report.user_properties).get("allure_uid")
+        if uid:
+            failed_uids.add(uid)
+
+
+def pytest_sessionfinish(session):
+    shutdown_driver_pool()
+
+    path = session.config.getoption("save_failed_plan")
+    if not path or hasattr(session.config, "workerinput") or SESSION_PLAN_KEY not in session.config.stash:
+        return
+    failed_cases = [case for case in session.config.stash[SESSION_PLAN_KEY] if case.get("allure_uid") in failed_uids]
+    save_test_plan(failed_cases, path)
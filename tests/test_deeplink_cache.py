@@ -0,0 +1,88 @@
+import time
+from contextlib import closing
+
+import pytest
+
+from App.DeeplinkCache import DeeplinkCache
+
+URL = "https://api.example.com/deeplinks/AT/de/W206"
+HEADERS = {"x-api-key": "test"}
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self._data
+
+
+class FakeGetter:
+    """Records the headers of every request and answers with the queued responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, url, headers):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DeeplinkCache(path=str(tmp_path / "deeplinks.sqlite"), ttl_seconds=60)
+
+
+def age_entry(cache, seconds):
+    entry = cache.lookup(URL)
+    with closing(cache._connect()) as connection, connection:
+        connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (entry["fetched_at"] - seconds, URL))
+
+
+def test_fresh_entry_is_served_without_a_request(cache):
+    getter = FakeGetter(FakeResponse(200, {"PRODUCT_PAGE": "a"}))
+    assert cache.get_json(URL, "AT/de", HEADERS, getter) == (200, {"PRODUCT_PAGE": "a"})
+    assert cache.get_json(URL, "AT/de", HEADERS, getter) == (200, {"PRODUCT_PAGE": "a"})
+    assert len(getter.requests) == 1
+
+
+def test_expired_entry_is_revalidated_and_304_keeps_the_data(cache):
+    getter = FakeGetter(
+        FakeResponse(200, {"PRODUCT_PAGE": "a"}, {"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}),
+        FakeResponse(304),
+    )
+    cache.get_json(URL, "AT/de", HEADERS, getter)
+    age_entry(cache, 61)
+
+    assert cache.get_json(URL, "AT/de", HEADERS, getter) == (200, {"PRODUCT_PAGE": "a"})
+    assert getter.requests[1]["If-None-Match"] == '"v1"'
+    assert getter.requests[1]["If-Modified-Since"] == "Mon, 05 Oct 2026 10:00:00 GMT"
+    assert cache.is_fresh(cache.lookup(URL))
+
+
+def test_market_ttl_overrides_the_default(tmp_path):
+    cache = DeeplinkCache(path=str(tmp_path / "deeplinks.sqlite"), ttl_seconds=60, market_ttls={"FR/fr": 3600})
+    cache.store(URL, "FR/fr", {})
+    age_entry(cache, 120)
+    assert cache.is_fresh(cache.lookup(URL))
+    assert cache.ttl_for("AT/de") == 60
+
+
+def test_refresh_after_refetches_without_conditional_headers(tmp_path):
+    path = str(tmp_path / "deeplinks.sqlite")
+    DeeplinkCache(path=path, ttl_seconds=60).store(URL, "AT/de", {"PRODUCT_PAGE": "old"}, etag='"v1"')
+    cache = DeeplinkCache(path=path, ttl_seconds=60, refresh_after=time.time() + 1)
+    getter = FakeGetter(FakeResponse(200, {"PRODUCT_PAGE": "new"}, {"ETag": '"v2"'}))
+
+    assert cache.get_json(URL, "AT/de", HEADERS, getter) == (200, {"PRODUCT_PAGE": "new"})
+    assert "If-None-Match" not in getter.requests[0]
+    assert cache.lookup(URL)["etag"] == '"v2"'
+
+
+def test_failed_request_is_not_cached(cache):
+    getter = FakeGetter(FakeResponse(404))
+    assert cache.get_json(URL, "AT/de", HEADERS, getter) == (404, None)
+    assert cache.lookup(URL) is None
@@ -0,0 +1,194 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from App import HttpClient as http_client_module
+from App.HttpClient import HttpClient, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Stands in for the pooled requests.Session: answers with the queued responses and tracks concurrency per host."""
+
+    def __init__(self, *responses, delay=0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = 0
+        self.active = {}
+        self.max_active = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        host = url.split("/")[2]
+        with self._lock:
+            self.calls += 1
+            self.active[host] = self.active.get(host, 0) + 1
+            self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.active[host] -= 1
+            response = self.responses.pop(0) if self.responses else FakeResponse()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_client(session, **kwargs):
+    client = HttpClient(rate_limit=0, **kwargs)
+    client._session = session
+    return client
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the retry waits of HttpClient.get instead of sleeping."""
+    recorded = []
+    monkeypatch.setattr(http_client_module.time, "sleep", recorded.append)
+    return recorded
+
+
+def test_per_host_limit_caps_concurrent_requests_per_host():
+    session = FakeSession(delay=0.05)
+    client = make_client(session, per_host_limit=2)
+    urls = [f"https://{host}/models/{i}" for host in ("a.example.com", "b.example.com") for i in range(6)]
+
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        list(executor.map(client.get, urls))
+
+    assert session.max_active == {"a.example.com": 2, "b.example.com": 2}
+
+
+def test_latency_summary_and_counters():
+    client = make_client(FakeSession())
+    assert client.latency_summary() == {"count": 0}
+
+    for i in range(4):
+        client.get(f"https://a.example.com/models/{i}")
+
+    summary = client.latency_summary()
+    assert summary["count"] == 4
+    assert 0 <= summary["p50_ms"] <= summary["p95_ms"] <= summary["max_ms"]
+    assert client.stats()["requests"] == 4
+
+
+def test_from_env_reads_the_conftest_options(monkeypatch):
+    monkeypatch.setenv("HTTP_CLIENT_PER_HOST_LIMIT", "3")
+    monkeypatch.setenv("HTTP_CLIENT_CONNECT_TIMEOUT", "2")
+    monkeypatch.setenv("HTTP_CLIENT_READ_TIMEOUT", "7")
+    client = HttpClient.from_env()
+    assert client.per_host_limit == 3
+    assert client.timeout == (2.0, 7.0)
+    client.close()
+
+
+@pytest.mark.parametrize("attempt", range(8))
+def test_backoff_is_jittered_below_the_exponential_bound(attempt):
+    client = HttpClient(rate_limit=0, backoff_base=0.5, backoff_max=30)
+    bound = min(30, 0.5 * 2 ** attempt)
+    waits = [client._backoff(attempt) for _ in range(200)]
+    assert all(0 <= wait <= bound for wait in waits)
+    assert max(waits) > bound / 2  # Full jitter spreads the waits over the whole range
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0),
+    ("0", 0.0),
+    ("-5", 0.0),
+    ("120", 30.0),  # Capped at backoff_max
+    ("soon", None),
+    ("", None),
+])
+def test_retry_after_seconds(value, expected):
+    client = HttpClient(rate_limit=0, backoff_max=30)
+    assert client._retry_after(FakeResponse(429, {"Retry-After": value})) == expected
+
+
+def test_retry_after_http_date():
+    client = HttpClient(rate_limit=0, backoff_max=30)
+    wait = client._retry_after(FakeResponse(503, {"Retry-After": formatdate(time.time() + 10, usegmt=True)}))
+    assert 8 <= wait <= 10
+    past = client._retry_after(FakeResponse(503, {"Retry-After": formatdate(time.time() - 60, usegmt=True)}))
+    assert past == 0.0
+
+
+def test_throttled_request_waits_for_retry_after(sleeps):
+    session = FakeSession(FakeResponse(429, {"Retry-After": "2"}), FakeResponse(200))
+    client = make_client(session)
+
+    assert client.get("https://a.example.com/models").status_code == 200
+    assert sleeps == [2.0]
+    assert client.stats() == {"requests": 2, "throttled": 1, "retried": 1, "dropped": 0}
+
+
+def test_request_is_dropped_after_max_retries(sleeps):
+    session = FakeSession(*[FakeResponse(503) for _ in range(3)])
+    client = make_client(session, max_retries=2, backoff_base=1, backoff_max=30)
+
+    assert client.get("https://a.example.com/models").status_code == 503
+    assert len(sleeps) == 2
+    assert sleeps[0] <= 1 and sleeps[1] <= 2
+    assert client.stats()["dropped"] == 1
+
+
+def test_connection_error_is_raised_after_max_retries(sleeps):
+    session = FakeSession(*[requests.exceptions.ConnectionError("reset") for _ in range(2)])
+    client = make_client(session, max_retries=1)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get("https://a.example.com/models")
+    assert session.calls == 2
+    assert client.stats()["dropped"] == 1
+
+
+def test_client_errors_are_not_retried(sleeps):
+    session = FakeSession(FakeResponse(404))
+    client = make_client(session)
+
+    assert client.get("https://a.example.com/models").status_code == 404
+    assert sleeps == []
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - start < 0.05  # The burst is served at once
+
+    bucket.acquire()  # Empty bucket: waits for one token, 1/20 s
+    assert 0.04 <= time.monotonic() - start < 0.5
+
+
+def test_token_bucket_never_holds_more_than_its_burst():
+    bucket = TokenBucket(rate=100, burst=3)
+    time.sleep(0.1)  # Long enough to refill 10 tokens
+    bucket.acquire()
+    assert bucket.tokens <= 2
+
+
+def test_get_json_goes_through_the_cache(tmp_path):
+    from App.DeeplinkCache import DeeplinkCache
+
+    class JsonResponse(FakeResponse):
+        def json(self):
+            return {"PRODUCT_PAGE": {"url": "https://a.example.com/pdp"}}
+
+    session = FakeSession(JsonResponse(200))
+    client = make_client(session)
+    cache = DeeplinkCache(path=str(tmp_path / "deeplinks.sqlite"))
+    url = "https://a.example.com/deeplinks/AT/de/W206"
+
+    first = client.get_json(url, {}, cache=cache, market_code="AT/de")
+    assert client.get_json(url, {}, cache=cache, market_code="AT/de") == first
+    assert first[0] == 200
+    assert session.calls == 1